@@ -0,0 +1,62 @@
+"""
+Micro-benchmark of the project normalizer and the JSON encoders on large
+synthetic project lists.
+
+    python -m benchmarks.bench_normalize [--projects 2000] [--owners 400] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from benchmarks.fake_upstreams import fake_project, fake_user
+from services.normalize import PROFILES, normalize_projects, render_projects
+from utils.json_provider import OrjsonProvider, orjson
+
+
+def timed(fn, repeat):
+    """Returns the best wall time of ``repeat`` runs, in milliseconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--projects", type=int, default=2000)
+    parser.add_argument("--owners", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    users = {str(owner_id): fake_user(owner_id, rng) for owner_id in range(1, args.owners + 1)}
+    projects = [fake_project(40000000 + i, rng.randint(1, args.owners), rng) for i in range(args.projects)]
+
+    app = Flask(__name__)
+    encoders = {"std": DefaultJSONProvider(app)}
+    if orjson is not None:
+        encoders["orjson"] = OrjsonProvider(app)
+
+    print(f"{args.projects} projects, {args.owners} owners, best of {args.repeat}")
+    records = normalize_projects(projects, users)
+    print(f"  normalize                {timed(lambda: normalize_projects(projects, users), args.repeat):8.1f} ms")
+
+    for profile in PROFILES:
+        rendered = render_projects(records, profile)
+        print(f"  render {profile:<8}         {timed(lambda: render_projects(records, profile), args.repeat):8.1f} ms")
+        for name, encoder in encoders.items():
+            size = len(encoder.dumps(rendered))
+            elapsed = timed(lambda: encoder.dumps(rendered), args.repeat)
+            print(f"  encode {profile:<8} {name:<7} {elapsed:8.1f} ms  ({size / 1024:.0f} KiB)")
+
+    if orjson is None:
+        print("  (orjson is not installed; only the standard encoder was measured)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""
+Local stand-ins for the Freelancer API and the Gemini API, for benchmarks.
+
+    python -m benchmarks.fake_upstreams [--freelancer-port 8101] [--gemini-port 8102] [--latency-ms 80] ...
+
+Point the app at them with FREELANCER_API=http://127.0.0.1:8101/api and
+GEMINI_API=http://127.0.0.1:8102/v1beta/models.
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+WORDS = "python react api scraping design shopify backend mobile data model deploy fix urgent".split()
+
+
+@dataclass
+class UpstreamConfig:
+    latency_ms: float = 80.0
+    jitter_ms: float = 20.0
+    gemini_latency_ms: float = 400.0
+    # Share of Freelancer calls answered with 429 and this Retry-After
+    rate_429: float = 0.0
+    # Whole seconds: urllib3 rejects fractional Retry-After values
+    retry_after: int = 1
+    description_words: int = 120
+    owners: int = 400
+    bid_chars: int = 1200
+    frontier_id: int = 40_000_000
+    # Every missing_every-th project ID is deleted or private
+    missing_every: int = 7
+
+
+def fake_user(user_id, rng):
+    return {
+        "id": user_id,
+        "username": f"client{user_id}",
+        "display_name": f"Client {user_id}",
+        "public_name": f"Client {user_id}",
+        "registration_date": 1500000000 + user_id,
+        "avatar_large_cdn": f"//cdn.example.com/{user_id}.jpg",
+        "role": "employer",
+        "chosen_role": "employer",
+        "location": {"city": "Berlin", "country": {"name": "Germany", "code": "de"}},
+        "status": {
+            "payment_verified": rng.random() > 0.3,
+            "email_verified": True,
+            "deposit_made": rng.random() > 0.5,
+            "identity_verified": False,
+            "phone_verified": True,
+        },
+        "employer_reputation": {"entire_history": {
+            "overall": round(rng.uniform(3, 5), 2),
+            "on_budget": round(rng.uniform(3, 5), 2),
+            "on_time": round(rng.uniform(3, 5), 2),
+            "positive": rng.random(),
+            "all": rng.randint(0, 200),
+            "reviews": rng.randint(0, 100),
+            "complete": rng.randint(0, 100),
+            "incomplete": rng.randint(0, 5),
+            "completion_rate": rng.random(),
+            "rehire_rate": rng.random(),
+            "category_ratings": {
+                "clarity_spec": 4.8, "communication": 4.9, "payment_prom": 5.0,
+                "professionalism": 4.7, "work_for_again": 4.9,
+            },
+        }},
+    }
+
+
+def fake_project(project_id, owner_id, rng, description_words=120):
+    description = " ".join(rng.choice(WORDS) for _ in range(description_words))
+    return {
+        "id": project_id,
+        "owner_id": owner_id,
+        "seo_url": f"python/project-{project_id}",
+        "title": f"Project {project_id} " + " ".join(rng.sample(WORDS, 4)),
+        "preview_description": description[:200],
+        "description": description,
+        "budget": {"minimum": 30, "maximum": 250},
+        "currency": {"code": "USD", "country": "US"},
+        "bid_stats": {"bid_count": rng.randint(0, 80), "bid_avg": rng.uniform(20, 300)},
+        "bidperiod": 7,
+    }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = UpstreamConfig()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _sleep(self, latency_ms):
+        jitter = self.config.jitter_ms
+        time.sleep(max(0.0, latency_ms + random.uniform(-jitter, jitter)) / 1000)
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, body=b"", content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _send_json(self, payload, status=200):
+        self._send(status, json.dumps(payload).encode("utf-8"))
+
+    def do_HEAD(self):
+        self._send(200)
+
+
+class FreelancerHandler(_Handler):
+    """Projects (active, by ID list, single), users, self and bids endpoints."""
+
+    def _project(self, project_id):
+        config = self.config
+        if project_id > config.frontier_id or project_id % config.missing_every == 0:
+            return None
+        rng = random.Random(project_id)
+        return fake_project(project_id, project_id % config.owners + 1, rng, config.description_words)
+
+    def _rate_limited(self):
+        if random.random() < self.config.rate_429:
+            self._send(429, b'{"status": "error"}', headers={"Retry-After": str(self.config.retry_after)})
+            return True
+        return False
+
+    def do_GET(self):
+        self._sleep(self.config.latency_ms)
+        if self._rate_limited():
+            return
+        url = urlsplit(self.path)
+        query = parse_qs(url.query)
+
+        if url.path.endswith("/projects/0.1/projects/active/"):
+            limit = int((query.get("limit") or ["10"])[0])
+            ids = range(self.config.frontier_id, 0, -1)
+            projects = []
+            for project_id in ids:
+                project = self._project(project_id)
+                if project:
+                    projects.append(project)
+                if len(projects) >= limit:
+                    break
+            return self._send_json({"status": "success", "result": {"projects": projects}})
+
+        if url.path.endswith("/projects/0.1/projects/"):
+            ids = [int(pid) for pid in query.get("projects[]", [])]
+            projects = [p for p in (self._project(pid) for pid in ids) if p]
+            return self._send_json({"status": "success", "result": {"projects": projects}})
+
+        match = re.search(r"/projects/0\.1/projects/(\d+)/$", url.path)
+        if match:
+            project = self._project(int(match.group(1)))
+            if project is None:
+                return self._send_json({"status": "error", "message": "Project not found"}, 404)
+            return self._send_json({"status": "success", "result": project})
+
+        if url.path.endswith("/users/0.1/users/"):
+            ids = [int(uid) for uid in query.get("users[]", [])]
+            users = {str(uid): fake_user(uid, random.Random(uid)) for uid in ids}
+            return self._send_json({"status": "success", "result": {"users": users}})
+
+        if url.path.endswith("/users/0.1/self/"):
+            return self._send_json({"status": "success", "result": {"id": 424242}})
+
+        self._send_json({"status": "error", "message": "Not found"}, 404)
+
+    def do_POST(self):
+        body = json.loads(self._read_body() or b"{}")
+        self._sleep(self.config.latency_ms)
+        if self._rate_limited():
+            return
+        if urlsplit(self.path).path.endswith("/projects/0.1/bids/"):
+            return self._send_json({"status": "success", "result": {
+                "id": random.randint(1, 10 ** 9),
+                "project_id": body.get("project_id"),
+                "bidder_id": body.get("bidder_id"),
+                "amount": body.get("amount"),
+            }})
+        self._send_json({"status": "error", "message": "Not found"}, 404)
+
+
+class GeminiHandler(_Handler):
+    """generateContent and streamGenerateContent (SSE)."""
+
+    def _bid_text(self):
+        words = []
+        while sum(len(w) + 1 for w in words) < self.config.bid_chars:
+            words.append(random.choice(WORDS))
+        return " ".join(words)
+
+    def do_POST(self):
+        self._read_body()
+        path = urlsplit(self.path).path
+        text = self._bid_text()
+
+        if path.endswith(":streamGenerateContent"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            self.close_connection = True
+            chunks = [text[i:i + 200] for i in range(0, len(text), 200)]
+            for chunk in chunks:
+                self._sleep(self.config.gemini_latency_ms / len(chunks))
+                event = {"candidates": [{"content": {"parts": [{"text": chunk}]}}]}
+                self.wfile.write(f"data: {json.dumps(event)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            return
+
+        if path.endswith(":generateContent"):
+            self._sleep(self.config.gemini_latency_ms)
+            return self._send_json({"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+        self._send_json({"error": {"message": "Not found"}}, 404)
+
+
+def make_servers(config, freelancer_port=0, gemini_port=0, host="127.0.0.1"):
+    """Returns the (freelancer, gemini) servers, bound but not yet serving."""
+    handlers = [
+        type("ConfiguredFreelancerHandler", (FreelancerHandler,), {"config": config}),
+        type("ConfiguredGeminiHandler", (GeminiHandler,), {"config": config}),
+    ]
+    servers = []
+    for handler, port in zip(handlers, (freelancer_port, gemini_port)):
+        server = ThreadingHTTPServer((host, port), handler)
+        server.daemon_threads = True
+        servers.append(server)
+    return servers
+
+
+def base_urls(freelancer, gemini):
+    """Returns the FREELANCER_API and GEMINI_API values for the servers."""
+    return (
+        f"http://{freelancer.server_address[0]}:{freelancer.server_address[1]}/api",
+        f"http://{gemini.server_address[0]}:{gemini.server_address[1]}/v1beta/models",
+    )
+
+
+def _serve(config, ready):
+    freelancer, gemini = make_servers(config)
+    threading.Thread(target=gemini.serve_forever, daemon=True).start()
+    ready.put(base_urls(freelancer, gemini))
+    freelancer.serve_forever()
+
+
+def start_process(config):
+    """
+    Serves both stand-ins from a child process, so they do not compete with
+    the app under test for the GIL. Returns (process, freelancer_api, gemini_api).
+    """
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(config, ready), daemon=True)
+    process.start()
+    freelancer_api, gemini_api = ready.get(timeout=10)
+    return process, freelancer_api, gemini_api
+
+
+def add_arguments(parser):
+    defaults = UpstreamConfig()
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="Freelancer latency")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--gemini-latency-ms", type=float, default=defaults.gemini_latency_ms)
+    parser.add_argument("--rate-429", type=float, default=defaults.rate_429, help="Share of Freelancer calls answered with 429")
+    parser.add_argument("--retry-after", type=int, default=defaults.retry_after)
+    parser.add_argument("--description-words", type=int, default=defaults.description_words)
+    parser.add_argument("--owners", type=int, default=defaults.owners)
+    parser.add_argument("--bid-chars", type=int, default=defaults.bid_chars)
+
+
+def config_from_args(args):
+    return UpstreamConfig(**{name: getattr(args, name) for name in asdict(UpstreamConfig()) if hasattr(args, name)})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--freelancer-port", type=int, default=8101)
+    parser.add_argument("--gemini-port", type=int, default=8102)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    freelancer, gemini = make_servers(config_from_args(args), args.freelancer_port, args.gemini_port)
+    freelancer_api, gemini_api = base_urls(freelancer, gemini)
+    print(f"FREELANCER_API={freelancer_api}")
+    print(f"GEMINI_API={gemini_api}")
+    threading.Thread(target=gemini.serve_forever, daemon=True).start()
+    try:
+        freelancer.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
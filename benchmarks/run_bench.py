@@ -0,0 +1,270 @@
+"""
+Offline benchmark of the main endpoints against local stand-ins for Freelancer,
+Gemini (benchmarks/fake_upstreams.py) and MongoDB (mongomock, in process).
+
+    pip install mongomock
+    python -m benchmarks.run_bench [--concurrency 1,8,32] [--requests 200] [--save] [--compare <sha>]
+
+The app is served by werkzeug's threaded server in this process; the stand-ins
+run in a child process. Numbers are for comparing commits on the same machine,
+not for predicting production latency.
+"""
+import argparse
+import glob
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from datetime import datetime
+
+import requests
+
+from benchmarks import fake_upstreams
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+SCENARIOS = ("search", "search_with_id", "generate", "place_bid", "tracker")
+
+
+def git_sha():
+    """Short HEAD sha, with a -dirty suffix when the tree has uncommitted changes."""
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"]).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{sha}-dirty" if dirty else sha
+
+
+def start_app(freelancer_api, gemini_api, args, workdir):
+    """Configures the app for the stand-ins, imports it and serves it. Returns its base URL."""
+    os.environ.update({
+        "FREELANCER_API": freelancer_api,
+        "GEMINI_API": gemini_api,
+        "PROD_TOKEN": "bench-token",
+        "GEMINI_API_KEY": "bench-key",
+        "FREELANCER_RATE_LIMIT": str(args.freelancer_rate),
+        "FREELANCER_BURST": str(args.freelancer_rate),
+        "RATE_LIMIT_STATE_FILE": os.path.join(workdir, "rate_limit.json"),
+        "SCAN_INDEX_PATH": os.path.join(workdir, "scan_index.db"),
+        "MONGO_ENSURE_INDEXES": "0",
+        "PREWARM": "0",
+    })
+
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit("mongomock is required for the in-process MongoDB: pip install mongomock")
+
+    from models import db
+    db.set_client(mongomock.MongoClient())
+    from models.bid_indexes import ensure_all_indexes
+    for problem in ensure_all_indexes():
+        print(f"⚠️ {problem}")
+
+    from werkzeug.serving import make_server
+    import finaltry
+
+    # One access-log line per request would drown the results
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    server = make_server("127.0.0.1", 0, finaltry.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def build_scenarios(config):
+    """Returns {name: fn(i) -> (method, path, kwargs)}; request bodies vary with i to defeat caches."""
+    project_ids = itertools.count(1)
+    frontier = config.frontier_id
+
+    def search(i):
+        return "POST", "/search", {"json": {
+            "query": f"python {i % 50}", "minPrice": 10, "maxPrice": 500, "project_type": "fixed",
+        }}
+
+    def search_with_id(i):
+        return "POST", "/search_with_id", {"json": {"start_id": frontier - 5000 + (i * 37) % 4900}}
+
+    def generate(i):
+        return "POST", "/generate", {"json": {
+            "project": {
+                "title": f"Benchmark project {i} {time.time_ns()}",
+                "description": "Need a Flask backend with MongoDB and a React dashboard. " * 20,
+                "budget": {"minimum": 100, "maximum": 500},
+                "currency": {"code": "USD"},
+            },
+            "userDetails": {},
+        }}
+
+    def place_bid(i):
+        return "POST", "/place_bid", {"json": {
+            "project_id": next(project_ids),
+            "bid": "Benchmark bid text",
+            "amount": 100 + i % 50,
+            "period": 7,
+            "project_title": f"Benchmark project {i}",
+            "user_id": f"bench-user-{i % 10}",
+            "user_email": f"bench{i % 10}@example.com",
+            "role": "user",
+        }}
+
+    def tracker(i):
+        role = "admin" if i % 2 else "user"
+        return "GET", f"/api/bids/tracker?user_id=bench-user-{i % 10}&role={role}", {}
+
+    return {
+        "search": search,
+        "search_with_id": search_with_id,
+        "generate": generate,
+        "place_bid": place_bid,
+        "tracker": tracker,
+    }
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_level(base_url, make_request, concurrency, total, warmup):
+    """Sends ``total`` requests with ``concurrency`` in flight. Returns the stats of the level."""
+    local = threading.local()
+
+    def send(i):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        method, path, kwargs = make_request(i)
+        start = time.perf_counter()
+        try:
+            ok = session.request(method, base_url + path, timeout=120, **kwargs).status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(send, range(-warmup, 0)))
+        start = time.perf_counter()
+        results = list(pool.map(send, range(total)))
+        elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds * 1000 for seconds, _ in results)
+    return {
+        "requests": total,
+        "errors": sum(1 for _, ok in results if not ok),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2),
+        "throughput_rps": round(total / elapsed, 2),
+    }
+
+
+def load_results(ref):
+    """Loads saved results by file path or by (a prefix of) the git sha they were saved under."""
+    if os.path.isfile(ref):
+        path = ref
+    else:
+        matches = sorted(glob.glob(os.path.join(RESULTS_DIR, f"{ref}*.json")))
+        if not matches:
+            sys.exit(f"No saved results match {ref!r} in {RESULTS_DIR}")
+        path = matches[-1]
+    with open(path) as f:
+        return json.load(f)
+
+
+def _delta(old, new):
+    if not old or new is None:
+        return ""
+    return f"{(new - old) / old * 100:+.0f}%"
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<15} {'conc':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8} {'errors':>6}"
+    if baseline:
+        header += f"   vs {baseline['sha']}: p50 / p95 / req/s"
+    print(header)
+    for scenario, levels in results["results"].items():
+        for concurrency, stats in levels.items():
+            line = (
+                f"{scenario:<15} {concurrency:>4} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+                f"{stats['p99_ms']:>9.1f} {stats['throughput_rps']:>8.1f} {stats['errors']:>6}"
+            )
+            old = ((baseline or {}).get("results", {}).get(scenario) or {}).get(concurrency)
+            if old:
+                line += "   " + " / ".join([
+                    _delta(old["p50_ms"], stats["p50_ms"]),
+                    _delta(old["p95_ms"], stats["p95_ms"]),
+                    _delta(old["throughput_rps"], stats["throughput_rps"]),
+                ])
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario and level")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests before each level")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--freelancer-rate", type=float, default=100000,
+                        help="FREELANCER_RATE_LIMIT for the app (the production default is 10)")
+    parser.add_argument("--save", action="store_true", help=f"Save the results under {RESULTS_DIR}")
+    parser.add_argument("--compare", metavar="SHA_OR_PATH", help="Show deltas against saved results")
+    fake_upstreams.add_arguments(parser)
+    args = parser.parse_args()
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(",")]
+    baseline = load_results(args.compare) if args.compare else None
+
+    config = fake_upstreams.config_from_args(args)
+    _, freelancer_api, gemini_api = fake_upstreams.start_process(config)
+    workdir = tempfile.mkdtemp(prefix="freelancer-bench-")
+    base_url = start_app(freelancer_api, gemini_api, args, workdir)
+    requests_by_scenario = build_scenarios(config)
+
+    results = {
+        "sha": git_sha(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "concurrency": levels,
+            "requests": args.requests,
+            "freelancer_rate": args.freelancer_rate,
+            "upstreams": asdict(config),
+        },
+        "results": {},
+    }
+    for scenario in scenarios:
+        results["results"][scenario] = {}
+        for concurrency in levels:
+            print(f"⏱️ {scenario} x{concurrency} ...", flush=True)
+            results["results"][scenario][str(concurrency)] = run_level(
+                base_url, requests_by_scenario[scenario], concurrency, args.requests, args.warmup
+            )
+
+    print()
+    print_results(results, baseline)
+
+    if args.save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{results['sha']}.json")
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Saved results to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
-from flask import jsonify, request, session
+from flask import Response, jsonify, request, session
 from models.bid_model import (
     create_bid,
     get_user_bids,
     get_all_bids,
+    iter_bids,
     update_bid,
     delete_bid
 )
-from datetime import datetime
+from datetime import datetime, timedelta
+import csv
+import io
+import json
+
+EXPORT_FIELDS = [
+    "_id", "user_id", "user_email", "username", "role", "title", "link", "project_id",
+    "amount", "period", "status", "created_at", "updated_at", "bid_text"
+]
 
 def add_bid():
     data = request.get_json()
@@ -32,22 +41,83 @@ def add_bid():
     }), 201
 
 
+def _page_args():
+    """Reads ?limit=&cursor=&fields=summary for the paginated bid lists."""
+    return {
+        "limit": request.args.get("limit", type=int),
+        "cursor": request.args.get("cursor"),
+        "summary": request.args.get("fields") == "summary",
+    }
+
+
 def get_my_bids():
     user_email = session.get("email")
     if not user_email:
         return jsonify({"success": False, "error": "Unauthorized"}), 401
 
-    bids = get_user_bids(user_email)
-    for bid in bids:
-        bid["_id"] = str(bid["_id"])
-    return jsonify({"success": True, "bids": bids})
+    try:
+        bids, next_cursor = get_user_bids(user_email, **_page_args())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "bids": bids, "next_cursor": next_cursor})
 
 
 def get_all_user_bids():
-    bids = get_all_bids()
+    try:
+        bids, next_cursor = get_all_bids(**_page_args())
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    return jsonify({"success": True, "bids": bids, "next_cursor": next_cursor})
+
+
+def _export_ndjson(bids):
+    for bid in bids:
+        yield json.dumps(bid, default=str) + "\n"
+
+
+def _export_csv(bids, fields):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
     for bid in bids:
-        bid["_id"] = str(bid["_id"])
-    return jsonify({"success": True, "bids": bids})
+        writer.writerow(bid)
+        # Hand each row to the client as soon as it is written
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_bids():
+    """
+    Streams bids as NDJSON (default) or CSV (?format=csv) with constant memory.
+    Filters: ?from=YYYY-MM-DD&to=YYYY-MM-DD (inclusive), ?user_id=, ?user_email=,
+    and ?fields=summary to leave out bid_text.
+    """
+    fmt = request.args.get("format", "ndjson")
+    summary = request.args.get("fields") == "summary"
+    try:
+        date_from = datetime.strptime(request.args["from"], "%Y-%m-%d") if request.args.get("from") else None
+        date_to = datetime.strptime(request.args["to"], "%Y-%m-%d") + timedelta(days=1) if request.args.get("to") else None
+    except ValueError:
+        return jsonify({"success": False, "error": "Dates must be YYYY-MM-DD"}), 400
+
+    bids = iter_bids(
+        date_from=date_from,
+        date_to=date_to,
+        user_id=request.args.get("user_id"),
+        user_email=request.args.get("user_email"),
+        summary=summary
+    )
+
+    if fmt == "csv":
+        fields = [f for f in EXPORT_FIELDS if not (summary and f == "bid_text")]
+        return Response(_export_csv(bids, fields), mimetype="text/csv", headers={
+            "Content-Disposition": "attachment; filename=bids.csv"
+        })
+    return Response(_export_ndjson(bids), mimetype="application/x-ndjson", headers={
+        "Content-Disposition": "attachment; filename=bids.ndjson"
+    })
 
 
 def edit_bid(bid_id):
@@ -1,34 +1,47 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, send_from_directory
+from dotenv import load_dotenv
+
+# Load .env before anything reads its configuration, STARTUP_PROFILE included
+load_dotenv()
+
+from utils import startup
+
+startup.begin()
+
+from flask import Flask, Response, request, jsonify
 import requests
 import sys
 import json
-import webbrowser
 import threading
-from functools import wraps
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta, timezone
 import os
 from flask_cors import CORS
-from dotenv import load_dotenv
-import jwt
 import time
-from requests.exceptions import RequestException, HTTPError
 from routes.bid_routes import bid_bp
+from services.freelancer_service import (
+    FREELANCER_API, FreelancerAPIError, iter_scan_as_completed, scan_projects, fetch_users, find_latest_project_id, get_bidder_id,
+    freelancer_get, freelancer_post, owner_cache
+)
+from services.gemini_service import (
+    GEMINI_API, GeminiError, bid_cache, cached_text, generate_cached, remember_text, stream_text
+)
+from services.normalize import PROFILE_COMPACT, PROFILE_FULL, normalize_projects, render_projects, resolve_profile
+from services.prompt_budget import fit_description, prompt_stats
+from utils import http_client, metrics
+from utils.cache import SWRCache
+from utils.json_provider import init_json
 from models.bid_model import create_bid, get_user_bids
-from bson import ObjectId
-from pymongo import MongoClient
-import pytz
+from models.rollup_model import backfill_rollups, get_month_rollups, record_bid
+from models.db import get_bids_collection, get_client
 
-ist = pytz.timezone("Asia/Kolkata")
+startup.mark("imports")
 
-load_dotenv()
 sys.stdout.reconfigure(encoding='utf-8')
 
 app = Flask(__name__)
-
-MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
-db = client["freelancer_bids"]
-bids_collection = db["bids"]
+init_json(app)
+metrics.instrument_app(app)
 
 app.register_blueprint(bid_bp)
 
@@ -41,6 +54,56 @@ app.secret_key = os.getenv('SECRET_KEY', 'default_secret')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 PROD_TOKEN = os.getenv('PROD_TOKEN')
 
+SEARCH_CACHE_SIZE = int(os.getenv('SEARCH_CACHE_SIZE', 256))
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 30))
+SEARCH_CACHE_STALE_TTL = int(os.getenv('SEARCH_CACHE_STALE_TTL', 120))
+
+search_cache = SWRCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, SEARCH_CACHE_STALE_TTL)
+
+LATEST_LOOKBACK = int(os.getenv('LATEST_LOOKBACK', 30))
+
+GEMINI_BATCH_CONCURRENCY = int(os.getenv('GEMINI_BATCH_CONCURRENCY', 4))
+GEMINI_BATCH_MAX_ITEMS = int(os.getenv('GEMINI_BATCH_MAX_ITEMS', 25))
+GEMINI_ITEM_TIMEOUT = float(os.getenv('GEMINI_ITEM_TIMEOUT', 60))
+
+# Longer than the slowest place_bid: a rate-limit cooldown (up to 300 s), then
+# the bidder ID refresh and two 30 s posts on the 401/403 path
+BID_PENDING_TIMEOUT = int(os.getenv('BID_PENDING_TIMEOUT', 600))
+
+MONGO_ENSURE_INDEXES = os.getenv('MONGO_ENSURE_INDEXES', '1') == '1'
+PREWARM = os.getenv('PREWARM', '1') == '1'
+
+
+def warm_up():
+    """
+    Startup work that runs in the background so the first request never waits
+    for it: creates/verifies the bid indexes, backfills empty bid rollups, then
+    opens the MongoDB, Freelancer and Gemini connection pools and resolves the
+    bidder ID. Never raises.
+    """
+    if MONGO_ENSURE_INDEXES:
+        from models.bid_indexes import bootstrap_indexes
+        bootstrap_indexes()
+        startup.mark("bid indexes")
+        backfill_rollups()
+        startup.mark("bid rollups")
+
+    if PREWARM:
+        try:
+            get_client().admin.command("ping")
+            startup.mark("mongodb ping")
+        except Exception as e:
+            print(f"Warning: Could not reach MongoDB while warming up: {e}")
+
+        http_client.warm(FREELANCER_API, GEMINI_API)
+        startup.mark("http pools")
+
+        if PROD_TOKEN:
+            get_bidder_id()
+            startup.mark("bidder id")
+
+    startup.report()
+
 @app.route('/search', methods=['POST'])
 # @login_required
 def search_projects():
@@ -49,11 +112,32 @@ def search_projects():
     minp = data.get('minPrice')
     maxp = data.get('maxPrice')
     project_types = data.get('project_type')
+    profile = resolve_profile((data or {}).get('profile'), PROFILE_FULL)
+
+    # Identical searches within SEARCH_CACHE_TTL share one upstream fetch. Results
+    # with unresolved clients (users lookup failed) are served but not cached.
+    cache_key = json.dumps([" ".join(query.lower().split()), str(minp), str(maxp), str(project_types)])
+    try:
+        projects, _ = search_cache.get_or_load(
+            cache_key,
+            lambda: fetch_search_results(query, minp, maxp, project_types),
+            cacheable=lambda result: result[1]
+        )
+    except FreelancerAPIError as e:
+        return jsonify({"error": str(e)}), 500
+
+    return jsonify(render_projects(projects, profile))
 
+
+def fetch_search_results(query, minp, maxp, project_types):
+    """
+    Runs a /search against Freelancer. Returns (records, complete): the projects
+    as normalized records, and whether every project owner could be resolved.
+    """
     limit = 10
 
     url = (
-        "https://www.freelancer.com/api/projects/0.1/projects/active/"
+        f"{FREELANCER_API}/projects/0.1/projects/active/"
         f"?compact=&limit={limit}&full_description=true&project_types%5B%5D={project_types}"
         f"&max_avg_price={maxp}%3D&min_avg_price={minp}&query={query}"
     )
@@ -65,143 +149,63 @@ def search_projects():
     }
 
     try:
-        r = requests.get(url, headers=HEADERS, timeout=15)
+        r = freelancer_get(url, headers=HEADERS, timeout=15)
         r.raise_for_status()
         data = r.json()
 
         if data.get('status') != 'success':
-            return jsonify({"error": data.get('message', "Unknown API error")}), 500
+            raise FreelancerAPIError(data.get('message', "Unknown API error"))
 
         all_projects = data.get("result", {}).get("projects", [])
     except requests.exceptions.RequestException as e:
-        return jsonify({"error": f"Error fetching projects: {e}"}), 500
+        raise FreelancerAPIError(f"Error fetching projects: {e}")
 
     # Collect all unique owner IDs
     owner_ids = list(set(project.get('owner_id') for project in all_projects if project.get('owner_id')))
 
-    # Fetch all client information in bulk
-    clients_data = {}
+    # Fetch all client information in bulk (cached profiles are not re-requested)
+    clients_data = fetch_users(owner_ids, HEADERS)
+    complete = all(str(uid) in clients_data for uid in owner_ids)
+
+    return normalize_projects(all_projects, clients_data), complete
+
+def resolve_start_id(data):
+    """
+    Reads ``start_id`` from a /search_with_id body. Returns (start_id, frontier_id, error)
+    where error is a ready (response, status) tuple when the input is unusable.
+    """
+    start_id = (data or {}).get('start_id')
+    frontier_id = None
+
+    if not start_id:
+        return None, None, (jsonify({"error": "Project ID is required"}), 400)
 
-    if owner_ids:
+    # "latest" scans the newest LATEST_LOOKBACK project IDs instead of a typed-in start
+    if str(start_id).strip().lower() == 'latest':
         try:
-            # Fetch users in bulk with employer reputation
-            user_ids_param = '&'.join([f'users[]={uid}' for uid in owner_ids])
-            users_url = f"https://www.freelancer.com/api/users/0.1/users/?{user_ids_param}&employer_reputation=true&jobs=true"
-
-            users_response = requests.get(users_url, headers=HEADERS, timeout=15)
-            users_response.raise_for_status()
-            users_result = users_response.json()
-
-            if users_result.get('status') == 'success':
-                users = users_result.get('result', {}).get('users', {})
-                clients_data = users
-        except requests.exceptions.RequestException as e:
-            print(f"Warning: Could not fetch client data: {e}")
-
-    projects = []
-
-    for project in all_projects:
-        budget_info = project.get('budget', {})
-        currency_info = project.get('currency', {})
-
-        bid_stats = project.get('bid_stats', {})
-        bid_count = bid_stats.get('bid_count', 0)
-        bid_avg = bid_stats.get('bid_avg', 0)
-
-        owner_id = project.get('owner_id')
-
-        # Get client information
-        client_info = clients_data.get(str(owner_id), {}) if owner_id else {}
-
-        # Extract employer reputation data
-        employer_reputation = client_info.get('employer_reputation', {})
-        entire_history = employer_reputation.get('entire_history', {})
-
-        # Get category ratings
-        category_ratings = entire_history.get('category_ratings', {})
-
-        client_data = {
-            'id': owner_id,
-            'username': client_info.get('username', 'N/A'),
-            'display_name': client_info.get('display_name', 'N/A'),
-            'public_name': client_info.get('public_name'),
-            'country': client_info.get('location', {}).get('country', {}).get('name', 'N/A'),
-            'country_code': client_info.get('location', {}).get('country', {}).get('code'),
-            'city': client_info.get('location', {}).get('city'),
-            'registration_date': client_info.get('registration_date'),
-            'profile_url': f"https://www.freelancer.com/u/{client_info.get('username', '')}" if client_info.get('username') else None,
-            'avatar': client_info.get('avatar_large_cdn') or client_info.get('avatar_large') or client_info.get('avatar_cdn'),
-            'company': client_info.get('company'),
-            'role': client_info.get('role'),
-            'chosen_role': client_info.get('chosen_role'),
-            'rating': {
-                'overall': entire_history.get('overall'),
-                'on_budget': entire_history.get('on_budget'),
-                'on_time': entire_history.get('on_time'),
-                'positive': entire_history.get('positive'),
-                'all': entire_history.get('all'),
-                'reviews': entire_history.get('reviews'),
-                'complete': entire_history.get('complete'),
-                'incomplete': entire_history.get('incomplete'),
-                'completion_rate': entire_history.get('completion_rate'),
-                'rehire_rate': entire_history.get('rehire_rate'),
-                'category_ratings': {
-                    'clarity_spec': category_ratings.get('clarity_spec'),
-                    'communication': category_ratings.get('communication'),
-                    'payment_prom': category_ratings.get('payment_prom'),
-                    'professionalism': category_ratings.get('professionalism'),
-                    'work_for_again': category_ratings.get('work_for_again')
-                }
-            },
-            'payment_verified': client_info.get('status', {}).get('payment_verified'),
-            'email_verified': client_info.get('status', {}).get('email_verified'),
-            'deposit_made': client_info.get('status', {}).get('deposit_made'),
-            'identity_verified': client_info.get('status', {}).get('identity_verified'),
-            'phone_verified': client_info.get('status', {}).get('phone_verified'),
-            'limited_account': client_info.get('limited_account'),
-            'membership_package': client_info.get('membership_package'),
-        }
+            frontier_id = find_latest_project_id()
+        except FreelancerAPIError as e:
+            return None, None, (jsonify({"error": str(e)}), 500)
+        start_id = frontier_id - LATEST_LOOKBACK + 1
 
-        projects.append({
-            'id': project.get('id'),
-            'seo_url': project.get('seo_url'),
-            'title': project.get('title', 'N/A'),
-            'preview_description': project.get('preview_description', '').strip(),
-            'description': project.get('description', '').strip(),
-            'budget': {
-                'minimum': budget_info.get('minimum', 0),
-                'maximum': budget_info.get('maximum', 0)
-            },
-            'currency': {
-                'code': currency_info.get('code', 'NA')
-            },
-            'bid_stats': {
-                'bid_count': bid_count,
-                'bid_avg': round(bid_avg, 2)
-            },
-            'country': {
-                'country': currency_info.get('country', 'NA')
-            },
-            'bidperiod': project.get('bidperiod', None),
-            'client': client_data
-        })
+    try:
+        start_id = int(start_id)
+    except ValueError:
+        return None, None, (jsonify({"error": "Invalid project ID"}), 400)
+
+    return start_id, frontier_id, None
 
-    return jsonify(projects)
 
 @app.route('/search_with_id', methods=['POST'])
 # @login_required
 def search_with_id():
-    import time
     data = request.get_json()
-    start_id = data.get('start_id')
-    
-    if not start_id:
-        return jsonify({"error": "Project ID is required"}), 400
-    
-    try:
-        start_id = int(start_id)
-    except ValueError:
-        return jsonify({"error": "Invalid project ID"}), 400
+    if data and data.get('stream'):
+        return stream_search_with_id(data)
+
+    start_id, frontier_id, error = resolve_start_id(data)
+    if error:
+        return error
 
     HEADERS = {
         "accept": "application/json",
@@ -209,47 +213,10 @@ def search_with_id():
         "Freelancer-OAuth-V1": PROD_TOKEN
     }
 
-    projects = []
-    project_ids_checked = []
-    current_id = start_id
-    max_attempts = 50  
-    attempts = 0
-
     print(f"🔍 Starting project search from ID {start_id} ...")
 
-    while len(projects) < 20 and attempts < max_attempts:
-        project_id = current_id
-        project_ids_checked.append(project_id)
-
-        try:
-            url = f"https://www.freelancer.com/api/projects/0.1/projects/{project_id}/?full_description=true"
-            r = requests.get(url, headers=HEADERS, timeout=10)
-
-            # --- Handle Rate Limiting ---
-            if r.status_code == 429:
-                retry_after = int(r.headers.get("Retry-After", 5))
-                print(f"⚠️ Rate limit hit at project {project_id}. Waiting {retry_after}s...")
-                time.sleep(retry_after)
-                continue
-
-            # --- Handle successful project fetch ---
-            if r.status_code == 200:
-                response_data = r.json()
-                if response_data.get('status') == 'success':
-                    project = response_data.get('result')
-                    if project:
-                        projects.append(project)
-                        print(f"✅ Project {project_id} added ({len(projects)} found)")
-            else:
-                print(f"⏭️ Skipping project {project_id}, HTTP {r.status_code}")
-
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching project {project_id}: {e}")
-
-        # Delay between requests to prevent API rate limit
-        time.sleep(0.3)
-        current_id += 1
-        attempts += 1
+    projects, project_ids_checked = scan_projects(start_id, max_found=20, max_attempts=50)
+    end_id = project_ids_checked[-1] if project_ids_checked else start_id - 1
 
     # --- No projects found case ---
     if not projects:
@@ -260,117 +227,246 @@ def search_with_id():
 
     # --- Collect all unique owner IDs ---
     owner_ids = list(set(p.get('owner_id') for p in projects if p.get('owner_id')))
-    clients_data = {}
-
-    # --- Fetch all client data in bulk ---
-    if owner_ids:
-        try:
-            user_ids_param = '&'.join([f'users[]={uid}' for uid in owner_ids])
-            users_url = f"https://www.freelancer.com/api/users/0.1/users/?{user_ids_param}&employer_reputation=true&jobs=true"
-            
-            users_response = requests.get(users_url, headers=HEADERS, timeout=15)
-
-            if users_response.status_code == 429:
-                retry_after = int(users_response.headers.get("Retry-After", 5))
-                print(f"Rate limit hit while fetching users. Waiting {retry_after}s...")
-                time.sleep(retry_after)
-                users_response = requests.get(users_url, headers=HEADERS, timeout=15)
-
-            users_response.raise_for_status()
-            users_result = users_response.json()
 
-            if users_result.get('status') == 'success':
-                clients_data = users_result.get('result', {}).get('users', {})
-
-        except requests.exceptions.RequestException as e:
-            print(f"Warning: Could not fetch client data: {e}")
+    # --- Fetch all client data in bulk (cached profiles are not re-requested) ---
+    clients_data = fetch_users(owner_ids, HEADERS)
 
     # --- Format the data for frontend ---
-    formatted_projects = []
-    for project in projects:
-        budget_info = project.get('budget', {}) or {}
-        currency_info = project.get('currency', {}) or {}
-        bid_stats = project.get('bid_stats', {}) or {}
-        owner_id = project.get('owner_id')
-
-        client_info = clients_data.get(str(owner_id), {}) if owner_id else {}
-        employer_reputation = client_info.get('employer_reputation', {}) or {}
-        entire_history = employer_reputation.get('entire_history', {}) or {}
-        location = client_info.get('location', {}) or {}
-        country_info = location.get('country', {}) or {}
-
-        formatted_projects.append({
-            'id': project.get('id'),
-            'seo_url': project.get('seo_url'),
-            'title': project.get('title', 'N/A'),
-            'preview_description': (project.get('preview_description') or '').strip(),
-            'description': (project.get('description') or '').strip(),
-            'budget': {
-                'minimum': budget_info.get('minimum', 0),
-                'maximum': budget_info.get('maximum', 0)
-            },
-            'currency': {
-                'code': currency_info.get('code', 'NA')
-            },
-            'bid_stats': {
-                'bid_count': bid_stats.get('bid_count', 0),
-                'bid_avg': round(float(bid_stats.get('bid_avg') or 0), 2)
-            },
-            'client': {
-                'id': owner_id,
-                'country': country_info.get('name', 'N/A'),
-                'rating': {
-                    'overall': entire_history.get('overall'),
-                    'on_budget': entire_history.get('on_budget'),
-                    'on_time': entire_history.get('on_time'),
-                    'positive': entire_history.get('positive'),
-                    'reviews': entire_history.get('reviews'),
-                    'completion_rate': entire_history.get('completion_rate'),
-                },
-            }
-        })
+    profile = resolve_profile((data or {}).get('profile'), PROFILE_COMPACT)
+    formatted_projects = render_projects(normalize_projects(projects, clients_data), profile)
 
-    print(f"Search complete: {len(formatted_projects)} valid projects found from ID {start_id} to {current_id - 1}")
+    print(f"Search complete: {len(formatted_projects)} valid projects found from ID {start_id} to {end_id}")
 
     return jsonify({
         'projects': formatted_projects,
         'start_id': start_id,
-        'end_id': current_id - 1,
+        'end_id': end_id,
         'total_found': len(formatted_projects),
-        'checked_ids': project_ids_checked
+        'checked_ids': project_ids_checked,
+        'frontier_id': frontier_id
     })
 
 
+def stream_event(event, payload, fmt):
+    """Encodes one streamed event as an NDJSON line or a Server-Sent Event."""
+    body = json.dumps(payload, default=str)
+    if fmt == 'sse':
+        return f"event: {event}\ndata: {body}\n\n"
+    return json.dumps({'type': event, **payload}, default=str) + "\n"
+
+
+def stream_response(events, fmt):
+    mimetype = 'text/event-stream' if fmt == 'sse' else 'application/x-ndjson'
+    return Response(events, mimetype=mimetype, headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+
+def stream_search_with_id(data):
+    """
+    /search_with_id with ``stream: true``: emits each project as soon as its
+    lookup batch and client records are in (so not in ID order), then a
+    summary event with the scan range and the checked IDs in ID order.
+    ``format`` selects "ndjson" (default) or "sse".
+    """
+    fmt = 'sse' if data.get('format') == 'sse' else 'ndjson'
+    profile = resolve_profile(data.get('profile'), PROFILE_COMPACT)
+    start_id, frontier_id, error = resolve_start_id(data)
+    if error:
+        return error
+
+    def generate():
+        checked_ids = []
+        total_found = 0
+        print(f"🔍 Streaming project search from ID {start_id} ...")
+
+        for checked in iter_scan_as_completed(start_id, max_found=20, max_attempts=50):
+            checked_ids.extend(project_id for project_id, _ in checked)
+            projects = [project for _, project in checked if project]
+            if not projects:
+                continue
+
+            # Client records are fetched per batch, so each micro-batch is complete
+            clients_data = fetch_users([p.get('owner_id') for p in projects])
+            for record in normalize_projects(projects, clients_data):
+                total_found += 1
+                yield stream_event('project', {'project': record.to_dict(profile)}, fmt)
+
+        checked_ids.sort()
+        summary = {
+            'start_id': start_id,
+            'end_id': checked_ids[-1] if checked_ids else start_id - 1,
+            'total_found': total_found,
+            'checked_ids': checked_ids,
+            'frontier_id': frontier_id
+        }
+        if not total_found:
+            summary['error'] = "No projects found in this ID range"
+        yield stream_event('summary', summary, fmt)
+
+    return stream_response(generate(), fmt)
+
+
 @app.route('/generate', methods=['POST'])
 # @login_required
 def generate_bid_route():
     """Generate a custom bid in your required structure."""
     data = request.get_json()
+    if data and data.get('stream'):
+        return stream_generated_bid(data)
+
+    project = data.get('project', {})
+    user_details = data.get('userDetails', {})
+
+    if not GEMINI_API_KEY:
+        return jsonify({'error': 'Gemini API key is not configured.'}), 500
+
+    prompt = create_personalized_prompt(project, user_details)
+
+    # Identical prompts are served from the bid cache unless "regenerate" is set
+    try:
+        bid_text, cached = generate_cached(prompt, regenerate=bool(data.get('regenerate')))
+    except GeminiError as e:
+        return jsonify({'error': str(e)}), 500
+
+    return jsonify({'bid': bid_text, 'cached': cached})
+
+
+def stream_generated_bid(data):
+    """
+    /generate with ``stream: true``: relays the bid text as the model writes it
+    (chunk events), then sends the assembled bid in a final done event.
+    ``format`` selects "sse" (default) or "ndjson".
+    """
     project = data.get('project', {})
     user_details = data.get('userDetails', {})
+    fmt = 'ndjson' if data.get('format') == 'ndjson' else 'sse'
 
     if not GEMINI_API_KEY:
         return jsonify({'error': 'Gemini API key is not configured.'}), 500
 
     prompt = create_personalized_prompt(project, user_details)
+    regenerate = bool(data.get('regenerate'))
+
+    def generate():
+        cached = None if regenerate else cached_text(prompt)
+        if cached is not None:
+            yield stream_event('chunk', {'text': cached}, fmt)
+            yield stream_event('done', {'bid': cached, 'cached': True}, fmt)
+            return
 
-    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-flash-preview-05-20:generateContent?key={GEMINI_API_KEY}"
-    headers = {'Content-Type': 'application/json'}
-    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+        chunks = []
+        try:
+            for text in stream_text(prompt):
+                chunks.append(text)
+                yield stream_event('chunk', {'text': text}, fmt)
+        except GeminiError as e:
+            yield stream_event('error', {'error': str(e), 'partial': ''.join(chunks)}, fmt)
+            return
+        remember_text(prompt, ''.join(chunks))
+        yield stream_event('done', {'bid': ''.join(chunks), 'cached': False}, fmt)
 
+    return stream_response(generate(), fmt)
+
+
+def generate_batch_item(index, project, user_details, regenerate=False):
+    """Generates one bid of a batch; errors are returned in the item instead of raised."""
+    if not isinstance(project, dict) or not project:
+        return {'index': index, 'project_id': None, 'error': 'Each project must be a non-empty object'}
+
+    item = {'index': index, 'project_id': project.get('id')}
     try:
-        response = requests.post(api_url, headers=headers, json=payload, timeout=90)
-        response.raise_for_status()
-        result = response.json()
+        prompt = create_personalized_prompt(project, user_details)
+        item['bid'], item['cached'] = generate_cached(
+            prompt, regenerate=regenerate, timeout=GEMINI_ITEM_TIMEOUT
+        )
+    except GeminiError as e:
+        item['error'] = str(e)
+    except Exception as e:
+        item['error'] = f'Could not generate bid: {e}'
+    return item
 
-        if 'candidates' in result and result['candidates'][0]['content']['parts'][0]['text']:
-            bid_text = result['candidates'][0]['content']['parts'][0]['text']
-            return jsonify({'bid': bid_text})
-        else:
-            return jsonify({'error': "AI returned no content."}), 500
 
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': f'AI service error: {e}'}), 500
+def run_batch(projects, user_details, regenerate, workers):
+    """
+    Yields one result per project as soon as it finishes. An item still running
+    GEMINI_ITEM_TIMEOUT seconds after it started is reported as timed out; its
+    Gemini call keeps its worker until it ends (and still fills the bid cache).
+    """
+    started = {}
+
+    def run(index, project):
+        started[index] = time.monotonic()
+        return generate_batch_item(index, project, user_details, regenerate)
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {pool.submit(run, index, project): index for index, project in enumerate(projects)}
+        while pending:
+            # Items that have not started yet cannot expire before now + GEMINI_ITEM_TIMEOUT
+            now = time.monotonic()
+            deadline = min(
+                [started[index] + GEMINI_ITEM_TIMEOUT for index in pending.values() if index in started]
+                + [now + GEMINI_ITEM_TIMEOUT]
+            )
+            done, _ = wait(pending, timeout=max(0.0, deadline - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                del pending[future]
+                yield future.result()
+
+            now = time.monotonic()
+            for future, index in list(pending.items()):
+                if index in started and now - started[index] >= GEMINI_ITEM_TIMEOUT:
+                    del pending[future]
+                    project = projects[index]
+                    yield {
+                        'index': index,
+                        'project_id': project.get('id') if isinstance(project, dict) else None,
+                        'error': f'Timed out after {GEMINI_ITEM_TIMEOUT:g}s'
+                    }
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+@app.route('/generate_batch', methods=['POST'])
+# @login_required
+def generate_batch_route():
+    """
+    Generates bids for a list of projects with at most GEMINI_BATCH_CONCURRENCY
+    Gemini calls in flight. Returns per-project results in input order, or with
+    ``stream: true`` streams each result as NDJSON as soon as it finishes.
+    """
+    data = request.get_json() or {}
+    projects = data.get('projects') or []
+    user_details = data.get('userDetails', {})
+
+    if not GEMINI_API_KEY:
+        return jsonify({'error': 'Gemini API key is not configured.'}), 500
+    if not isinstance(projects, list) or not projects:
+        return jsonify({'error': 'A non-empty list of projects is required'}), 400
+    if len(projects) > GEMINI_BATCH_MAX_ITEMS:
+        return jsonify({'error': f'At most {GEMINI_BATCH_MAX_ITEMS} projects per batch'}), 400
+
+    workers = min(GEMINI_BATCH_CONCURRENCY, len(projects))
+    regenerate = bool(data.get('regenerate'))
+
+    if not data.get('stream'):
+        results = sorted(run_batch(projects, user_details, regenerate, workers), key=lambda item: item['index'])
+        return jsonify({
+            'results': results,
+            'total': len(results),
+            'failed': sum(1 for item in results if 'error' in item)
+        })
+
+    def generate():
+        failed = 0
+        for item in run_batch(projects, user_details, regenerate, workers):
+            failed += 'error' in item
+            yield stream_event('result', item, 'ndjson')
+        yield stream_event('done', {'total': len(projects), 'failed': failed}, 'ndjson')
+
+    return stream_response(generate(), 'ndjson')
 
 
 @app.route('/generate_graphics', methods=['POST'])
@@ -409,6 +505,62 @@ Team Mactix"""
     return jsonify({'bid': graphics_bid})
 
 
+def claim_bid(bid_data):
+    """
+    Inserts ``bid_data`` as the user's claim on the project. Returns (bid_id, None)
+    on success, or (None, existing_bid) when the user already has a bid (or
+    already used the idempotency key). A "pending" claim left behind for longer
+    than BID_PENDING_TIMEOUT, e.g. by a crashed worker, is taken over in place.
+    ``bid_data["claim_token"]`` identifies the claim; only its holder may
+    finish or release it.
+    """
+    from pymongo.errors import DuplicateKeyError
+
+    bid_data["claim_token"] = uuid.uuid4().hex
+
+    def find_existing():
+        existing_bid = None
+        if bid_data.get("idempotency_key"):
+            existing_bid = get_bids_collection().find_one({
+                "user_id": bid_data["user_id"],
+                "idempotency_key": bid_data["idempotency_key"]
+            })
+        if existing_bid is None:
+            existing_bid = get_bids_collection().find_one({
+                "user_id": bid_data["user_id"],
+                "project_id": bid_data["project_id"]
+            })
+        return existing_bid
+
+    for _ in range(2):
+        # Checked first as well: the unique index is built in the background and
+        # may be missing (MONGO_ENSURE_INDEXES=0, legacy duplicates)
+        existing_bid = find_existing()
+        if existing_bid is None:
+            try:
+                return get_bids_collection().insert_one(bid_data).inserted_id, None
+            except DuplicateKeyError:
+                bid_data.pop("_id", None)
+            existing_bid = find_existing()
+            if existing_bid is None:
+                continue
+
+        stale_before = bid_data["created_at"] - timedelta(seconds=BID_PENDING_TIMEOUT)
+        if existing_bid.get("status") == "pending" and existing_bid.get("updated_at", stale_before) <= stale_before:
+            # Compare-and-set: fails if the holder finished, or another retry took it first
+            taken = get_bids_collection().find_one_and_replace({
+                "_id": existing_bid["_id"],
+                "status": "pending",
+                "updated_at": existing_bid.get("updated_at")
+            }, bid_data)
+            if taken is not None:
+                return existing_bid["_id"], None
+            continue
+        return None, existing_bid
+
+    return None, existing_bid
+
+
 @app.route('/place_bid', methods=['POST'])
 def place_bid():
     """
@@ -437,28 +589,66 @@ def place_bid():
     if not user_id or not user_email:
         return jsonify({'error': 'User information required'}), 400
 
-    # Duplicate Check - check if user already bid on this project
-    existing_bid = bids_collection.find_one({
-    "user_id": user_id,
-    "project_id": project_id
-    })
-    
-    if existing_bid:
+    # Optional client-supplied key so that retries of the same request are safe
+    idempotency_key = request.headers.get('Idempotency-Key') or data.get('idempotency_key')
+
+    IST = timezone(timedelta(hours=5, minutes=30))
+
+    current_ist = datetime.now(IST).replace(tzinfo=None)
+
+    # Bid document, inserted up front as "pending" to claim (user_id, project_id)
+    bid_data = {
+        "user_id": user_id,
+        "user_email": user_email,
+        "role": role,
+        "username":  user_email.split('@')[0],
+        "title": project_title,
+        "link": project_url,
+        "project_id": project_id,
+        "amount": amount,
+        "period": period,
+        "bid_text": bid_text,
+        "status": "pending",
+        "created_at": current_ist,
+        "updated_at": current_ist
+    }
+    if idempotency_key:
+        bid_data["idempotency_key"] = idempotency_key
+
+    # Duplicate Check - the unique (user_id, project_id) index makes the claim atomic,
+    # claim_bid also looks for an existing bid first in case the index is missing
+    claim_id, existing_bid = claim_bid(bid_data)
+
+    if claim_id is None:
+        if existing_bid and idempotency_key and existing_bid.get("idempotency_key") == idempotency_key:
+            if (str(existing_bid.get("project_id")) != str(project_id)
+                    or existing_bid.get("amount") != amount
+                    or existing_bid.get("bid_text") != bid_text):
+                return jsonify({
+                    'success': False,
+                    'message': 'This Idempotency-Key was already used for a different bid'
+                }), 422
+            if existing_bid.get("status") == "pending":
+                return jsonify({
+                    'success': False,
+                    'message': 'This bid is still being placed'
+                }), 409
+            # Retried request: answer with the original result, no second upstream call
+            return jsonify({
+                "success": True,
+                "message": "✅ Bid sent successfully and stored!",
+                "bid_id": str(existing_bid["_id"]),
+                "external": existing_bid.get("external_response"),
+                "idempotent_replay": True
+            }), 200
+
         return jsonify({
             'success': False,
             'message': 'You have already bid on this project'
         }), 409
 
-    # Try to get bidder ID from Freelancer API (optional)
-    bidder_id = None
-    try:
-        url_self = "https://www.freelancer.com/api/users/0.1/self/"
-        headers = {"Authorization": f"Bearer {PROD_TOKEN}"}
-        response = requests.get(url_self, headers=headers, timeout=30)
-        response.raise_for_status()
-        bidder_id = response.json().get("result", {}).get("id")
-    except Exception:
-        bidder_id = None
+    # Bidder ID is resolved once from PROD_TOKEN and cached (optional)
+    bidder_id = get_bidder_id()
 
     # Prepare bid payload for Freelancer API
     bid_payload = {
@@ -476,53 +666,60 @@ def place_bid():
     }
 
     external_status = "not_sent"
-    external_response = None
 
     # Try to submit to Freelancer API
     try:
-        r = requests.post(
-            "https://www.freelancer.com/api/projects/0.1/bids/",
+        r = freelancer_post(
+            f"{FREELANCER_API}/projects/0.1/bids/",
             headers=headers_post,
             json=bid_payload,
             timeout=30
         )
+
+        # Auth error: the cached bidder ID may be stale, refresh it and retry once
+        if r.status_code in (401, 403):
+            bid_payload["bidder_id"] = get_bidder_id(force_refresh=True)
+            r = freelancer_post(
+                f"{FREELANCER_API}/projects/0.1/bids/",
+                headers=headers_post,
+                json=bid_payload,
+                timeout=30
+            )
         r.raise_for_status()
+        external_response = r.json()
     except Exception as err:
-        # ❌ DO NOT SAVE IN DB
+        # ❌ DO NOT SAVE IN DB - release the claim so the user can try again
+        get_bids_collection().delete_one({"_id": claim_id, "claim_token": bid_data["claim_token"], "status": "pending"})
         return jsonify({
             "success": False,
             "message": "❌ Failed to submit bid to Freelancer API.",
             "error": str(err)
         }), 500
-    
-    IST = timezone(timedelta(hours=5, minutes=30))
 
-    current_ist = datetime.now(IST).replace(tzinfo=None)
-    
-    # Store bid in MongoDB with user information
-    bid_data = {
-        "user_id": user_id,
-        "user_email": user_email,
-        "role": role,
-        "username":  user_email.split('@')[0],
-        "title": project_title,
-        "link": project_url,
-        "project_id": project_id,
-        "amount": amount,
-        "period": period,
-        "bid_text": bid_text,
-        "status": external_status,
-        "created_at": current_ist,
-        "updated_at": current_ist
-    }
-    
-    result = bids_collection.insert_one(bid_data)
+    # Store the final bid state (and the upstream answer for idempotent replays)
+    result = get_bids_collection().update_one(
+        {"_id": claim_id, "claim_token": bid_data["claim_token"], "status": "pending"},
+        {"$set": {
+            "status": external_status,
+            "external_response": external_response,
+            "updated_at": datetime.now(IST).replace(tzinfo=None)
+        }, "$unset": {"claim_token": ""}}
+    )
+    if result.matched_count == 0:
+        # A retry took the claim over after BID_PENDING_TIMEOUT; it owns the stored bid
+        print(f"⚠️ Lost the claim on project {project_id} for user {user_id} after posting the bid")
+        return jsonify({
+            "success": False,
+            "message": "This bid was taken over by a later request before it finished",
+            "external": external_response
+        }), 409
+    record_bid(bid_data)
 
     return jsonify({
         "success": True,
         "message": "✅ Bid sent successfully and stored!",
-        "bid_id": str(result.inserted_id),
-        "external": r.json()
+        "bid_id": str(claim_id),
+        "external": external_response
     }), 200
     # # Return response
     # if external_status == "sent":
@@ -552,25 +749,69 @@ def place_bid():
 def get_bid_tracker():
     """
     Get bid tracker data. Expects user_id and role as query parameters.
-    For admin: returns all users' bids grouped by user and date
-    For user: returns only their bids grouped by date
+    For admin: returns all users' daily totals grouped by user and date
+    For user: returns only their daily totals grouped by date
+    Month views come from the daily rollups; pass date=YYYY-MM-DD to drill
+    into one day and get its bids as well.
     """
     year = request.args.get('year', datetime.now().year, type=int)
     month = request.args.get('month', datetime.now().month, type=int)
     user_id = request.args.get('user_id')
     user_role = request.args.get('role', 'user')
+    day = request.args.get('date')
+    is_admin = user_role in ['admin', 'super-admin']
     
     if not user_id:
         return jsonify({'error': 'User ID required'}), 400
+
+    if not day:
+        rollups = get_month_rollups(year, month, None if is_admin else user_id)
+        if is_admin:
+            users_data = {}
+            for item in rollups:
+                uid = item['user_id']
+                if uid not in users_data:
+                    users_data[uid] = {
+                        'user_id': uid,
+                        'username': item.get('username'),
+                        'dates': {}
+                    }
+                users_data[uid]['dates'][item['date']] = {
+                    'date': item['date'],
+                    'total_count': item['total_count'],
+                    'total_amount': item['total_amount']
+                }
+            return jsonify({
+                'success': True,
+                'year': year,
+                'month': month,
+                'is_admin': True,
+                'users': list(users_data.values())
+            })
+
+        return jsonify({
+            'success': True,
+            'year': year,
+            'month': month,
+            'is_admin': False,
+            'dates': {
+                item['date']: {
+                    'date': item['date'],
+                    'total_count': item['total_count'],
+                    'total_amount': item['total_amount']
+                }
+                for item in rollups
+            }
+        })
+
+    # Drill-down: load the bids of a single day
+    try:
+        start_date = datetime.strptime(day, '%Y-%m-%d')
+    except ValueError:
+        return jsonify({'error': 'date must be YYYY-MM-DD'}), 400
+    end_date = start_date + timedelta(days=1)
     
-    # Date range for the selected month
-    start_date = datetime(year, month, 1)
-    if month == 12:
-        end_date = datetime(year + 1, 1, 1)
-    else:
-        end_date = datetime(year, month + 1, 1)
-    
-    if user_role in ['admin', 'super-admin']:
+    if is_admin:
         # Get all bids for all users
         pipeline = [
             {
@@ -578,7 +819,8 @@ def get_bid_tracker():
                     'created_at': {
                         '$gte': start_date,
                         '$lt': end_date
-                    }
+                    },
+                    'status': {'$ne': 'pending'}
                 }
             },
             {
@@ -614,7 +856,7 @@ def get_bid_tracker():
             }
         ]
         
-        results = list(bids_collection.aggregate(pipeline))
+        results = list(get_bids_collection().aggregate(pipeline))
         
         # Group by user
         users_data = {}
@@ -654,7 +896,8 @@ def get_bid_tracker():
                     'created_at': {
                         '$gte': start_date,
                         '$lt': end_date
-                    }
+                    },
+                    'status': {'$ne': 'pending'}
                 }
             },
             {
@@ -686,7 +929,7 @@ def get_bid_tracker():
             }
         ]
         
-        results = list(bids_collection.aggregate(pipeline))
+        results = list(get_bids_collection().aggregate(pipeline))
         
         dates_data = {}
         for item in results:
@@ -707,11 +950,36 @@ def get_bid_tracker():
         })
 
 
+@app.route('/api/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Reports size and hit/miss counters of the in-process caches."""
+    return jsonify({
+        'success': True,
+        'owner_profiles': owner_cache.stats(),
+        'search_results': search_cache.stats(),
+        'generated_bids': bid_cache.stats()
+    })
+
+
+@app.route('/api/prompt/stats', methods=['GET'])
+def get_prompt_stats():
+    """Reports prompt sizes before and after the description budget is applied."""
+    return jsonify({'success': True, 'prompts': prompt_stats.stats()})
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics summed over all workers (see METRICS_DIR): routes, upstream calls and MongoDB commands."""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+
 # -------------------- CUSTOM PROMPT BUILDER --------------------
 def create_personalized_prompt(project, user_details):
     """Builds AI prompt for a structured Mactix-style bid."""
     title = project.get('title', '')
-    description = project.get('description', '')
+    raw_description = project.get('description', '') or ''
+    # Long descriptions are trimmed to the configured budget to keep Gemini fast
+    description = fit_description(raw_description, title)
     budget = project.get('budget', {})
     currency = project.get('currency', {}).get('code', 'USD')
     
@@ -719,7 +987,7 @@ def create_personalized_prompt(project, user_details):
     max_b = budget.get('maximum', 0)
     budget_text = f"Budget: {min_b}-{max_b} {currency}" if min_b and max_b else ""
     
-    return f"""
+    prompt = f"""
 You are a professional bid writer at Mactix Global Solutions.
 Write a compelling bid that MUST be under 1400 characters.
 
@@ -816,10 +1084,19 @@ Team Mactix
 
 Now write the bid. Count characters and ensure it's under 1400.
 """
+    prompt_stats.record(len(prompt) - len(description) + len(raw_description), len(prompt))
+    return prompt
 
 def open_browser():
+    import webbrowser
     webbrowser.open_new("http://127.0.0.1:5000")
 
 
+startup.mark("app ready")
+
+# Indexes and warm-up run in the background so the first request never waits on them
+threading.Thread(target=warm_up, daemon=True).start()
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5000)
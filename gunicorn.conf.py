@@ -0,0 +1,28 @@
+import glob
+import os
+import tempfile
+
+# Upstream-heavy routes (/search, /search_with_id, /generate, /place_bid) spend
+# almost all their time waiting on Freelancer, Gemini or MongoDB. gevent workers
+# monkey-patch sockets, so requests and pymongo yield while they wait and one
+# worker process can hold hundreds of waiting requests instead of one.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gevent")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 500))
+
+# /generate may legitimately wait on Gemini for up to GEMINI_TIMEOUT (90s)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+if os.getenv("PORT"):
+    bind = f"0.0.0.0:{os.getenv('PORT')}"
+
+# Workers save their /metrics series here so every scrape sees the sum over all
+# of them (see utils/metrics.py). Cleared when the master starts.
+os.environ.setdefault("METRICS_DIR", os.path.join(tempfile.gettempdir(), "app_metrics"))
+
+
+def on_starting(server):
+    for path in glob.glob(os.path.join(os.environ["METRICS_DIR"], "*.json")):
+        os.remove(path)
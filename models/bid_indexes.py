@@ -0,0 +1,145 @@
+import sys
+from datetime import datetime
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from models.bid_model import BIDS_PAGE_SIZE
+from models.db import get_bids_collection, get_rollups_collection
+
+# Every index the bid queries rely on, by name: (keys, options).
+# Keep in sync with the queries below.
+BID_INDEXES = {
+    # place_bid claim: one bid per (user_id, project_id). Partial, because bids
+    # stored through POST /api/bids carry neither field.
+    "user_id_project_id_unique": ([("user_id", ASCENDING), ("project_id", ASCENDING)], {
+        "unique": True,
+        "partialFilterExpression": {"user_id": {"$exists": True}, "project_id": {"$exists": True}},
+    }),
+    # place_bid replays of a client-supplied Idempotency-Key, scoped to the user
+    "user_id_idempotency_key_unique": ([("user_id", ASCENDING), ("idempotency_key", ASCENDING)], {
+        "unique": True,
+        "partialFilterExpression": {"idempotency_key": {"$type": "string"}},
+    }),
+    # get_user_bids: find({"user_email"}) paged on (created_at, _id) descending
+    "user_email_created_at_id": (
+        [("user_email", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}
+    ),
+    # get_all_bids paged on (created_at, _id), and the admin tracker $match on created_at
+    "created_at_id": ([("created_at", DESCENDING), ("_id", DESCENDING)], {}),
+    # user tracker: $match on user_id + created_at range
+    "user_id_created_at": ([("user_id", ASCENDING), ("created_at", DESCENDING)], {}),
+}
+
+ROLLUP_INDEXES = {
+    # record_bid upserts: one rollup per (user_id, date)
+    "user_id_date_unique": ([("user_id", ASCENDING), ("date", ASCENDING)], {"unique": True}),
+    # tracker month view: find({"month", ["user_id"]}).sort("date", -1)
+    "month_user_id_date": ([("month", ASCENDING), ("user_id", ASCENDING), ("date", DESCENDING)], {}),
+}
+
+
+def ensure_indexes(collection=None, specs=BID_INDEXES):
+    """Creates missing indexes and verifies existing ones match their spec. Returns problems found."""
+    collection = collection if collection is not None else get_bids_collection()
+    problems = []
+    for name, (keys, options) in specs.items():
+        try:
+            collection.create_index(keys, name=name, **options)
+        except ConnectionFailure:
+            raise
+        except PyMongoError as e:
+            problems.append(f"Could not create index {name}: {e}")
+
+    try:
+        existing = collection.index_information()
+    except PyMongoError as e:
+        return problems + [f"Could not list indexes: {e}"]
+
+    for name, (keys, options) in specs.items():
+        info = existing.get(name)
+        if info is None:
+            problems.append(f"Index {name} is missing")
+        elif [(field, int(direction)) for field, direction in info["key"]] != keys:
+            problems.append(f"Index {name} has keys {info['key']}, expected {keys}")
+        elif bool(info.get("unique")) != bool(options.get("unique")):
+            problems.append(f"Index {name} should {'' if options.get('unique') else 'not '}be unique")
+    return problems
+
+
+def ensure_all_indexes():
+    """Ensures the indexes of the bids and rollups collections."""
+    return ensure_indexes() + ensure_indexes(get_rollups_collection(), ROLLUP_INDEXES)
+
+
+def _hot_queries(collection):
+    """Yields (label, explain output) for every hot bid query."""
+    month_start = datetime(datetime.now().year, datetime.now().month, 1)
+    sample_user = "index-check"
+
+    yield "duplicate check", collection.find(
+        {"user_id": sample_user, "project_id": 0}
+    ).limit(1).explain()
+    yield "get_user_bids", collection.find(
+        {"user_email": sample_user}
+    ).sort([("created_at", -1), ("_id", -1)]).limit(BIDS_PAGE_SIZE + 1).explain()
+    yield "get_all_bids", collection.find().sort(
+        [("created_at", -1), ("_id", -1)]
+    ).limit(BIDS_PAGE_SIZE + 1).explain()
+
+    for label, match in (
+        ("admin tracker", {"created_at": {"$gte": month_start}}),
+        ("user tracker", {"user_id": sample_user, "created_at": {"$gte": month_start}}),
+    ):
+        yield label, collection.database.command(
+            "explain",
+            {"aggregate": collection.name, "pipeline": [{"$match": match}], "cursor": {}},
+            verbosity="queryPlanner",
+        )
+
+
+def _winning_plans(explain):
+    """Collects every winningPlan in an explain document (aggregate explains nest them in stages)."""
+    if isinstance(explain, dict):
+        for key, value in explain.items():
+            if key == "winningPlan":
+                yield value
+            else:
+                yield from _winning_plans(value)
+    elif isinstance(explain, list):
+        for value in explain:
+            yield from _winning_plans(value)
+
+
+def check_query_plans(collection=None):
+    """Explains the hot bid queries and returns the labels of those planned as a collection scan."""
+    collection = collection if collection is not None else get_bids_collection()
+    flagged = []
+    for label, explain in _hot_queries(collection):
+        if any("COLLSCAN" in str(plan) for plan in _winning_plans(explain)):
+            flagged.append(label)
+    return flagged
+
+
+def bootstrap_indexes():
+    """Startup hook: ensures indexes and logs collection scans in the hot queries. Never raises."""
+    try:
+        for problem in ensure_all_indexes():
+            print(f"⚠️ {problem}")
+        for label in check_query_plans():
+            print(f"⚠️ Bid query '{label}' is planned as a collection scan")
+    except Exception as e:
+        print(f"Warning: Could not bootstrap bid indexes: {e}")
+
+
+if __name__ == "__main__":
+    # python -m models.bid_indexes [--check]
+    problems = ensure_all_indexes()
+    flagged = check_query_plans() if "--check" in sys.argv else []
+    for problem in problems:
+        print(f"⚠️ {problem}")
+    for label in flagged:
+        print(f"⚠️ Bid query '{label}' is planned as a collection scan")
+    if not problems and not flagged:
+        print("✅ Bid indexes are in place")
+    sys.exit(1 if problems or flagged else 0)
@@ -1,13 +1,17 @@
-from pymongo import MongoClient
 from datetime import datetime
+import base64
+import json
 import os
 
-MONGO_URI = os.getenv("MONGO_URI")
-DB_NAME = os.getenv("DB_NAME", "freelancer_bids")
+from models.db import get_bids_collection
 
-client = MongoClient(MONGO_URI)
-db = client[DB_NAME]
-bids_collection = db["bids"]
+BIDS_PAGE_SIZE = int(os.getenv("BIDS_PAGE_SIZE", 50))
+BIDS_MAX_PAGE_SIZE = int(os.getenv("BIDS_MAX_PAGE_SIZE", 200))
+# List views that do not need the (large) bid text can ask for this projection
+SUMMARY_PROJECTION = {"bid_text": 0, "external_response": 0}
+BIDS_EXPORT_BATCH_SIZE = int(os.getenv("BIDS_EXPORT_BATCH_SIZE", 500))
+# place_bid claims still in flight (or left by a crashed worker) are not bids yet
+PLACED_ONLY = {"status": {"$ne": "pending"}}
 
 def create_bid(user_email, title, role, link, amount, period, bid_text, status="stored"):
     bid_data = {
@@ -22,22 +26,111 @@ def create_bid(user_email, title, role, link, amount, period, bid_text, status="
         "created_at": datetime.utcnow(),
         "updated_at": datetime.utcnow()
     }
-    result = bids_collection.insert_one(bid_data)
+    result = get_bids_collection().insert_one(bid_data)
+    from models.rollup_model import record_bid
+    record_bid(bid_data)
     return str(result.inserted_id)
 
-def get_user_bids(user_email):
-    return list(bids_collection.find({"user_email": user_email}).sort("created_at", -1))
+def encode_cursor(bid):
+    """Opaque keyset cursor pointing just after ``bid`` in (created_at, _id) descending order."""
+    from bson import ObjectId
+    raw = json.dumps({"t": bid["created_at"].isoformat(), "id": str(ObjectId(bid["_id"]))})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Raises ValueError for a cursor that was not produced by encode_cursor."""
+    from bson import ObjectId
+    from bson.errors import InvalidId
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(raw["t"]), ObjectId(raw["id"])
+    except (KeyError, TypeError, ValueError, InvalidId) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+
+def _bids_page(query, limit=None, cursor=None, summary=False):
+    """
+    Returns (bids, next_cursor) for one page of ``query``, newest first.
+    Pages are cut on (created_at, _id) so they stay stable while bids are added.
+    """
+    limit = max(1, min(int(limit or BIDS_PAGE_SIZE), BIDS_MAX_PAGE_SIZE))
+    query = {**query, **PLACED_ONLY}
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        query = {"$and": [query, {"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}}
+        ]}]}
+
+    projection = SUMMARY_PROJECTION if summary else None
+    bids = list(
+        get_bids_collection().find(query, projection)
+        .sort([("created_at", -1), ("_id", -1)])
+        .limit(limit + 1)
+    )
+    next_cursor = encode_cursor(bids[limit - 1]) if len(bids) > limit else None
+    bids = bids[:limit]
+    for bid in bids:
+        bid["_id"] = str(bid["_id"])
+    return bids, next_cursor
 
-def get_all_bids():
-    return list(bids_collection.find().sort("created_at", -1))
+def get_user_bids(user_email, limit=None, cursor=None, summary=False):
+    return _bids_page({"user_email": user_email}, limit, cursor, summary)
+
+def get_all_bids(limit=None, cursor=None, summary=False):
+    return _bids_page({}, limit, cursor, summary)
+
+def iter_bids(date_from=None, date_to=None, user_id=None, user_email=None, summary=False):
+    """
+    Streams bids matching the filters, newest first, straight from the cursor
+    (BIDS_EXPORT_BATCH_SIZE documents per round-trip). ``date_to`` is exclusive.
+    """
+    query = dict(PLACED_ONLY)
+    if date_from or date_to:
+        query["created_at"] = {}
+        if date_from:
+            query["created_at"]["$gte"] = date_from
+        if date_to:
+            query["created_at"]["$lt"] = date_to
+    if user_id:
+        query["user_id"] = user_id
+    if user_email:
+        query["user_email"] = user_email
+
+    projection = SUMMARY_PROJECTION if summary else None
+    cursor = (
+        get_bids_collection().find(query, projection)
+        .sort([("created_at", -1), ("_id", -1)])
+        .batch_size(BIDS_EXPORT_BATCH_SIZE)
+    )
+    try:
+        for bid in cursor:
+            bid["_id"] = str(bid["_id"])
+            yield bid
+    finally:
+        cursor.close()
 
 def update_bid(bid_id, updated_data):
     from bson import ObjectId
     updated_data["updated_at"] = datetime.utcnow()
-    result = bids_collection.update_one({"_id": ObjectId(bid_id)}, {"$set": updated_data})
-    return result.modified_count > 0
+    if "amount" not in updated_data:
+        result = get_bids_collection().update_one({"_id": ObjectId(bid_id)}, {"$set": updated_data})
+        return result.modified_count > 0
+
+    # Amount edits must also move the daily rollup, so read the old value atomically
+    from models.rollup_model import record_amount_change
+    previous = get_bids_collection().find_one_and_update({"_id": ObjectId(bid_id)}, {"$set": updated_data})
+    if previous is None:
+        return False
+    if previous.get("status") != "pending":
+        record_amount_change(previous, previous.get("amount"), updated_data["amount"])
+    return True
 
 def delete_bid(bid_id):
     from bson import ObjectId
-    result = bids_collection.delete_one({"_id": ObjectId(bid_id)})
-    return result.deleted_count > 0
+    from models.rollup_model import record_bid
+    deleted = get_bids_collection().find_one_and_delete({"_id": ObjectId(bid_id)})
+    if deleted is None:
+        return False
+    if deleted.get("status") != "pending":
+        record_bid(deleted, sign=-1)
+    return True
@@ -0,0 +1,70 @@
+import os
+import threading
+
+from utils import metrics
+
+MONGO_URI = os.getenv("MONGO_URI")
+DB_NAME = os.getenv("DB_NAME", "freelancer_bids")
+
+# --- POOL CONFIGURATION ---
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 10000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 30000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 10000))
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Returns the process-wide MongoClient, creating it on first use. A client
+    inherited through fork() is never reused: the child builds its own, so
+    gunicorn workers do not share sockets with the master.
+    """
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                # Imported here: pymongo is the heaviest import of the app
+                from pymongo import MongoClient
+
+                listeners = [metrics.mongo_command_listener()] if metrics.METRICS_ENABLED else []
+                _client = MongoClient(
+                    MONGO_URI,
+                    event_listeners=listeners,
+                    connect=False,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    minPoolSize=MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+                    waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                )
+                _client_pid = os.getpid()
+    return _client
+
+
+def set_client(client):
+    """Installs ``client`` as this process's MongoClient, e.g. an in-process stand-in for benchmarks."""
+    global _client, _client_pid
+    with _client_lock:
+        _client = client
+        _client_pid = os.getpid()
+
+
+def get_db():
+    return get_client()[DB_NAME]
+
+
+def get_bids_collection():
+    return get_db()["bids"]
+
+
+def get_rollups_collection():
+    return get_db()["bid_rollups"]
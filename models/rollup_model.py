@@ -0,0 +1,116 @@
+import sys
+
+from models.db import get_bids_collection, get_rollups_collection
+
+# Daily per-user bid totals for /api/bids/tracker (collection bid_rollups), kept
+# up to date on every bid write so the month view never aggregates the bids.
+
+
+def _day(created_at):
+    return created_at.strftime("%Y-%m-%d")
+
+
+def _amount(value):
+    # POST /api/bids stores whatever the client sent; $sum skips non-numbers, so do we
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def record_bid(bid, sign=1):
+    """Adds (sign=1) or removes (sign=-1) one bid from its user's daily rollup."""
+    from pymongo.errors import PyMongoError
+
+    if not bid.get("created_at"):
+        return
+    day = _day(bid["created_at"])
+    try:
+        get_rollups_collection().update_one(
+            {"user_id": bid.get("user_id"), "date": day},
+            {
+                "$inc": {"total_count": sign, "total_amount": sign * _amount(bid.get("amount"))},
+                "$set": {"username": bid.get("username"), "month": day[:7]},
+            },
+            upsert=True,
+        )
+    except PyMongoError as e:
+        print(f"Warning: Could not update bid rollup for {day}: {e}")
+
+
+def record_amount_change(bid, old_amount, new_amount):
+    """Applies an edited bid amount to its daily rollup."""
+    from pymongo.errors import PyMongoError
+
+    delta = _amount(new_amount) - _amount(old_amount)
+    if not delta or not bid.get("created_at"):
+        return
+    day = _day(bid["created_at"])
+    try:
+        get_rollups_collection().update_one(
+            {"user_id": bid.get("user_id"), "date": day},
+            {"$inc": {"total_amount": delta}},
+        )
+    except PyMongoError as e:
+        print(f"Warning: Could not update bid rollup for {day}: {e}")
+
+
+def get_month_rollups(year, month, user_id=None):
+    """Returns the daily rollups of a month, newest day first, optionally for one user."""
+    query = {"month": f"{year:04d}-{month:02d}", "total_count": {"$gt": 0}}
+    if user_id is not None:
+        query["user_id"] = user_id
+    return list(get_rollups_collection().find(query, {"_id": 0}).sort("date", -1))
+
+
+def rebuild_rollups():
+    """
+    Recomputes every rollup from the bids collection. Returns the number of
+    rollup documents. ``$out`` replaces the whole collection, so a record_bid
+    running meanwhile is lost: do not rebuild while bids are being written.
+    """
+    get_bids_collection().aggregate([
+        {"$match": {"created_at": {"$type": "date"}, "status": {"$ne": "pending"}}},
+        {"$group": {
+            "_id": {
+                "user_id": "$user_id",
+                "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+            },
+            "month": {"$first": {"$dateToString": {"format": "%Y-%m", "date": "$created_at"}}},
+            "username": {"$last": "$username"},
+            "total_count": {"$sum": 1},
+            "total_amount": {"$sum": "$amount"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "date": "$_id.date",
+            "month": 1,
+            "username": 1,
+            "total_count": 1,
+            "total_amount": 1,
+        }},
+        # $out swaps the collection in atomically and keeps its indexes
+        {"$out": get_rollups_collection().name},
+    ])
+    return get_rollups_collection().count_documents({})
+
+
+def backfill_rollups():
+    """
+    Startup hook: builds the rollups once, when bid_rollups is still empty but
+    bids exist (e.g. right after the rollups were introduced). Never raises.
+    """
+    try:
+        if get_rollups_collection().find_one({}, {"_id": 1}) is not None:
+            return
+        if get_bids_collection().find_one({"status": {"$ne": "pending"}}, {"_id": 1}) is None:
+            return
+        print(f"✅ Backfilled {rebuild_rollups()} daily bid rollups")
+    except Exception as e:
+        print(f"Warning: Could not backfill bid rollups: {e}")
+
+
+if __name__ == "__main__":
+    # python -m models.rollup_model --rebuild
+    if "--rebuild" not in sys.argv:
+        print("Usage: python -m models.rollup_model --rebuild")
+        sys.exit(2)
+    print(f"✅ Rebuilt {rebuild_rollups()} daily bid rollups")
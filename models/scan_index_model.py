@@ -0,0 +1,150 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from utils.blocking import run_blocking
+
+# Local, per-host index of project IDs probed by /search_with_id. SQLite takes
+# care of locking between gunicorn workers; each process keeps one connection,
+# used by one thread (or greenlet) at a time.
+SCAN_INDEX_PATH = os.getenv(
+    "SCAN_INDEX_PATH", os.path.join(tempfile.gettempdir(), "project_scan_index.db")
+)
+SCAN_INDEX_ENABLED = os.getenv("SCAN_INDEX_ENABLED", "1") == "1"
+# Valid projects change (bids, status), so their payload goes stale quickly
+SCAN_INDEX_VALID_TTL = int(os.getenv("SCAN_INDEX_VALID_TTL", 300))
+SCAN_INDEX_MISSING_TTL = int(os.getenv("SCAN_INDEX_MISSING_TTL", 6 * 3600))
+# Expired rows (valid ones hold the full project JSON) are deleted every N writes
+SCAN_INDEX_PRUNE_EVERY = int(os.getenv("SCAN_INDEX_PRUNE_EVERY", 200))
+
+STATE_VALID = "valid"
+STATE_MISSING = "missing"
+STATE_UNKNOWN = "unknown"
+
+_conn = {"conn": None, "pid": None, "writes": 0}
+_lock = threading.Lock()
+
+
+def _connection():
+    """Returns the process connection; the caller holds ``_lock``."""
+    conn = _conn["conn"]
+    if conn is None or _conn["pid"] != os.getpid():
+        # Not closed after a fork: the parent still owns it
+        conn = sqlite3.connect(SCAN_INDEX_PATH, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            " project_id INTEGER PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " payload TEXT,"
+            " checked_at REAL NOT NULL)"
+        )
+        _conn["conn"] = conn
+        _conn["pid"] = os.getpid()
+    return conn
+
+
+def _run(fn, *args):
+    """
+    Runs ``fn(conn, *args)`` on the process connection. SQLite's busy wait
+    blocks in C, so under gevent it runs on the hub's native threadpool.
+    """
+    with _lock:
+        return run_blocking(lambda: fn(_connection(), *args))
+
+
+def _select(conn, sql, params):
+    return conn.execute(sql, params).fetchall()
+
+
+def _write(conn, sql, rows):
+    with conn:
+        conn.executemany(sql, rows)
+
+
+def _prune(conn, expired_before):
+    with conn:
+        return conn.execute("DELETE FROM probes WHERE checked_at < ?", (expired_before,)).rowcount
+
+
+def lookup(project_ids):
+    """
+    Returns {project_id: (state, project)} for IDs whose index entry is still
+    fresh. Unknown, stale and never-seen IDs are left out and must be probed.
+    """
+    if not SCAN_INDEX_ENABLED or not project_ids:
+        return {}
+
+    now = time.time()
+    placeholders = ",".join("?" * len(project_ids))
+    try:
+        rows = _run(
+            _select,
+            f"SELECT project_id, state, payload, checked_at FROM probes WHERE project_id IN ({placeholders})",
+            list(project_ids),
+        )
+    except sqlite3.Error as e:
+        print(f"Warning: Scan index lookup failed: {e}")
+        return {}
+
+    known = {}
+    for project_id, state, payload, checked_at in rows:
+        age = now - checked_at
+        if state == STATE_VALID and age < SCAN_INDEX_VALID_TTL:
+            known[project_id] = (state, json.loads(payload))
+        elif state == STATE_MISSING and age < SCAN_INDEX_MISSING_TTL:
+            known[project_id] = (state, None)
+    return known
+
+
+def max_valid_id():
+    """Returns the highest project ID ever seen as valid, or None."""
+    if not SCAN_INDEX_ENABLED:
+        return None
+    try:
+        rows = _run(_select, "SELECT MAX(project_id) FROM probes WHERE state = ?", (STATE_VALID,))
+    except sqlite3.Error as e:
+        print(f"Warning: Scan index lookup failed: {e}")
+        return None
+    return rows[0][0] if rows else None
+
+
+def record(results):
+    """Stores probe outcomes given as (project_id, state, project) tuples."""
+    if not SCAN_INDEX_ENABLED or not results:
+        return
+
+    now = time.time()
+    rows = [
+        (project_id, state, json.dumps(project) if state == STATE_VALID else None, now)
+        for project_id, state, project in results
+    ]
+    try:
+        _run(
+            _write,
+            "INSERT OR REPLACE INTO probes (project_id, state, payload, checked_at) VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    except sqlite3.Error as e:
+        print(f"Warning: Scan index write failed: {e}")
+        return
+
+    _conn["writes"] += 1
+    if SCAN_INDEX_PRUNE_EVERY > 0 and _conn["writes"] % SCAN_INDEX_PRUNE_EVERY == 0:
+        prune(now)
+
+
+def prune(now=None):
+    """Deletes entries too old to be served under either TTL. Returns the number deleted."""
+    if not SCAN_INDEX_ENABLED:
+        return 0
+    expired_before = (now or time.time()) - max(SCAN_INDEX_VALID_TTL, SCAN_INDEX_MISSING_TTL)
+    try:
+        return _run(_prune, expired_before)
+    except sqlite3.Error as e:
+        print(f"Warning: Scan index prune failed: {e}")
+        return 0
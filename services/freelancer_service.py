@@ -0,0 +1,438 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from models import scan_index_model as scan_index
+from models.scan_index_model import STATE_MISSING, STATE_UNKNOWN, STATE_VALID
+from utils import http_client, metrics
+from utils.cache import TTLCache
+from utils.rate_limiter import freelancer_limiter, parse_retry_after
+
+# Overridable so the benchmarks can point the app at a local stand-in
+FREELANCER_API = os.getenv("FREELANCER_API", "https://www.freelancer.com/api").rstrip("/")
+
+# --- PROBE CONFIGURATION ---
+PROBE_CONCURRENCY = int(os.getenv("PROBE_CONCURRENCY", 5))
+PROBE_MAX_RETRIES = int(os.getenv("PROBE_MAX_RETRIES", 3))
+# "batch" looks IDs up through the projects list endpoint, "single" uses one GET per ID
+PROBE_MODE = os.getenv("PROBE_MODE", "batch")
+PROBE_BATCH_SIZE = int(os.getenv("PROBE_BATCH_SIZE", 10))
+
+# --- OWNER PROFILE CACHE ---
+OWNER_CACHE_SIZE = int(os.getenv("OWNER_CACHE_SIZE", 2000))
+OWNER_CACHE_TTL = int(os.getenv("OWNER_CACHE_TTL", 900))
+
+owner_cache = TTLCache(OWNER_CACHE_SIZE, OWNER_CACHE_TTL)
+
+# --- BIDDER IDENTITY ---
+BIDDER_ID_TTL = int(os.getenv("BIDDER_ID_TTL", 6 * 3600))
+
+_bidder = {"id": None, "expires_at": 0.0}
+_bidder_lock = threading.Lock()
+
+# --- FRONTIER DISCOVERY ---
+FRONTIER_TTL = int(os.getenv("FRONTIER_TTL", 60))
+# IDs looked at around each probe point; single IDs are often deleted or private
+FRONTIER_PROBE_SPAN = int(os.getenv("FRONTIER_PROBE_SPAN", 20))
+FRONTIER_MAX_STEPS = int(os.getenv("FRONTIER_MAX_STEPS", 20))
+
+_frontier = {"id": None, "expires_at": 0.0}
+_frontier_lock = threading.Lock()
+
+
+class FreelancerAPIError(Exception):
+    """Raised when a Freelancer API call fails in a way the route should report."""
+
+
+def freelancer_headers():
+    return {
+        "accept": "application/json",
+        "user-agent": http_client.USER_AGENT,
+        "Freelancer-OAuth-V1": os.getenv("PROD_TOKEN"),
+    }
+
+
+def freelancer_request(method, url, **kwargs):
+    """
+    Sends a Freelancer API call through the shared token bucket. A 429 response
+    puts every worker into the Retry-After cooldown before it is returned.
+    """
+    with metrics.rate_limit_wait.time():
+        freelancer_limiter.acquire()
+    r = http_client.request(method, url, **kwargs)
+    if r.status_code == 429:
+        retry_after = parse_retry_after(r.headers.get("Retry-After"))
+        print(f"⚠️ Freelancer rate limit hit. Cooling down for {retry_after:.0f}s...")
+        freelancer_limiter.cooldown(retry_after)
+    return r
+
+
+def freelancer_get(url, **kwargs):
+    return freelancer_request("GET", url, **kwargs)
+
+
+def freelancer_post(url, **kwargs):
+    return freelancer_request("POST", url, **kwargs)
+
+
+def fetch_users(owner_ids, headers=None):
+    """
+    Returns {str(owner_id): user} for the given owners, with employer reputation.
+    Profiles come from ``owner_cache`` when fresh; only the rest are requested
+    from the users bulk endpoint. Failures are logged and leave those owners out.
+    """
+    owner_ids = list(dict.fromkeys(str(uid) for uid in owner_ids if uid))
+    clients_data, missing = owner_cache.get_many(owner_ids)
+    if not missing:
+        return clients_data
+
+    headers = headers or freelancer_headers()
+    user_ids_param = '&'.join([f'users[]={uid}' for uid in missing])
+    users_url = f"{FREELANCER_API}/users/0.1/users/?{user_ids_param}&employer_reputation=true&jobs=true"
+
+    try:
+        users_response = freelancer_get(users_url, headers=headers, timeout=15)
+
+        # The shared limiter holds the retry until the Retry-After cooldown is over
+        if users_response.status_code == 429:
+            users_response = freelancer_get(users_url, headers=headers, timeout=15)
+
+        users_response.raise_for_status()
+        users_result = users_response.json()
+
+        if users_result.get('status') == 'success':
+            users = users_result.get('result', {}).get('users', {}) or {}
+            for uid, user in users.items():
+                owner_cache.set(str(uid), user)
+                clients_data[str(uid)] = user
+    except requests.exceptions.RequestException as e:
+        print(f"Warning: Could not fetch client data: {e}")
+
+    return clients_data
+
+
+def get_bidder_id(force_refresh=False):
+    """
+    Returns the Freelancer user ID behind PROD_TOKEN, resolving it through
+    /users/0.1/self/ only when it is not cached or has expired. Returns None
+    (and caches nothing) if the lookup fails.
+    """
+    with _bidder_lock:
+        if not force_refresh and _bidder["id"] and _bidder["expires_at"] > time.monotonic():
+            return _bidder["id"]
+
+        bidder_id = None
+        try:
+            url_self = f"{FREELANCER_API}/users/0.1/self/"
+            headers = {"Authorization": f"Bearer {os.getenv('PROD_TOKEN')}"}
+            response = freelancer_get(url_self, headers=headers, timeout=30)
+            response.raise_for_status()
+            bidder_id = response.json().get("result", {}).get("id")
+        except Exception as e:
+            print(f"Warning: Could not resolve bidder ID: {e}")
+
+        _bidder["id"] = bidder_id
+        _bidder["expires_at"] = time.monotonic() + BIDDER_ID_TTL if bidder_id else 0.0
+        return bidder_id
+
+
+def fetch_project(project_id, headers=None):
+    """
+    Fetches a single project by ID. Returns (state, project) where state is one
+    of the scan index states and project is set only for STATE_VALID.
+    """
+    headers = headers or freelancer_headers()
+    url = f"{FREELANCER_API}/projects/0.1/projects/{project_id}/?full_description=true"
+
+    for _ in range(PROBE_MAX_RETRIES + 1):
+        try:
+            r = freelancer_get(url, headers=headers, timeout=10)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Error fetching project {project_id}: {e}")
+            return STATE_UNKNOWN, None
+
+        # --- Rate limited: the next freelancer_get waits out the cooldown ---
+        if r.status_code == 429:
+            continue
+
+        if r.status_code >= 500:
+            print(f"⏭️ Skipping project {project_id}, HTTP {r.status_code}")
+            return STATE_UNKNOWN, None
+
+        if r.status_code != 200:
+            print(f"⏭️ Skipping project {project_id}, HTTP {r.status_code}")
+            return STATE_MISSING, None
+
+        response_data = r.json()
+        project = response_data.get('result') if response_data.get('status') == 'success' else None
+        return (STATE_VALID, project) if project else (STATE_MISSING, None)
+
+    print(f"⏭️ Giving up on project {project_id} after repeated rate limits")
+    return STATE_UNKNOWN, None
+
+
+def fetch_projects_batch(project_ids, headers=None):
+    """
+    Looks up several project IDs in one call to the projects list endpoint.
+    Returns {project_id: project} for the IDs that exist, or None if the batch
+    request itself failed and the caller should fall back to per-ID lookups.
+    """
+    headers = headers or freelancer_headers()
+    ids_param = '&'.join([f'projects[]={pid}' for pid in project_ids])
+    url = (
+        f"{FREELANCER_API}/projects/0.1/projects/"
+        f"?{ids_param}&full_description=true&limit={len(project_ids)}"
+    )
+
+    for _ in range(PROBE_MAX_RETRIES + 1):
+        try:
+            r = freelancer_get(url, headers=headers, timeout=15)
+        except requests.exceptions.RequestException as e:
+            print(f"❌ Error fetching projects {project_ids[0]}-{project_ids[-1]}: {e}")
+            return None
+
+        if r.status_code == 429:
+            continue
+
+        if r.status_code != 200:
+            print(f"⏭️ Batch lookup {project_ids[0]}-{project_ids[-1]} failed, HTTP {r.status_code}")
+            return None
+
+        response_data = r.json()
+        if response_data.get('status') != 'success':
+            return None
+
+        # IDs that are deleted, private or unknown are simply absent from the result
+        found = response_data.get('result', {}).get('projects', []) or []
+        return {p.get('id'): p for p in found if p.get('id') in project_ids}
+
+    return None
+
+
+def _lookup_batch(project_ids, headers):
+    """Returns one (state, project) per ID, falling back to per-ID GETs if the batch fails."""
+    found = fetch_projects_batch(project_ids, headers)
+    if found is None:
+        return [fetch_project(pid, headers) for pid in project_ids]
+    return [(STATE_VALID, found[pid]) if pid in found else (STATE_MISSING, None) for pid in project_ids]
+
+
+def _probe_ids(pool, project_ids, headers):
+    """Looks up every ID in parallel; the (state, project) results are aligned with the IDs."""
+    if PROBE_MODE == "single":
+        return list(pool.map(lambda pid: fetch_project(pid, headers), project_ids))
+
+    batches = [project_ids[i:i + PROBE_BATCH_SIZE] for i in range(0, len(project_ids), PROBE_BATCH_SIZE)]
+    results = []
+    for batch_result in pool.map(lambda ids: _lookup_batch(ids, headers), batches):
+        results.extend(batch_result)
+    return results
+
+
+def _record_probes(probed, known):
+    """
+    Saves fresh probe results to the scan index. A missing ID above every valid
+    ID we know of may simply not exist *yet*, so it is not recorded as missing.
+    """
+    valid_ids = [pid for pid, (state, _) in {**known, **probed}.items() if state == STATE_VALID]
+    high_water = max(valid_ids + [scan_index.max_valid_id() or 0])
+    scan_index.record([
+        (pid, state, project)
+        for pid, (state, project) in probed.items()
+        if not (state == STATE_MISSING and pid > high_water)
+    ])
+
+
+def _probe_window(pool, window, headers):
+    """Resolves a window of IDs from the scan index, probing only unseen or stale ones."""
+    known = scan_index.lookup(window)
+    to_probe = [pid for pid in window if pid not in known]
+    if known:
+        print(f"📇 {len(known)} of {len(window)} IDs served from the scan index")
+
+    probed = dict(zip(to_probe, _probe_ids(pool, to_probe, headers))) if to_probe else {}
+    _record_probes(probed, known)
+    return [known.get(pid) or probed[pid] for pid in window]
+
+
+def iter_scan(start_id, max_found=20, max_attempts=50):
+    """
+    Probes project IDs upward from ``start_id`` in parallel windows and yields
+    each window as a list of (project_id, project-or-None) in ID order. The
+    scan stops at the first ID that brings the number found to ``max_found``.
+    """
+    headers = freelancer_headers()
+    found = 0
+    next_id = start_id
+    last_id = start_id + max_attempts
+    window_size = PROBE_CONCURRENCY if PROBE_MODE == "single" else PROBE_CONCURRENCY * PROBE_BATCH_SIZE
+
+    with ThreadPoolExecutor(max_workers=PROBE_CONCURRENCY) as pool:
+        while found < max_found and next_id < last_id:
+            window = list(range(next_id, min(next_id + window_size, last_id)))
+            results = _probe_window(pool, window, headers)
+
+            checked = []
+            for project_id, (state, project) in zip(window, results):
+                checked.append((project_id, project))
+                if project:
+                    found += 1
+                    print(f"✅ Project {project_id} added ({found} found)")
+                if found >= max_found:
+                    break
+
+            yield checked
+            next_id = window[-1] + 1
+
+
+def _probe_as_completed(pool, window, headers):
+    """
+    Like ``_probe_window``, but yields (project_ids, results) per lookup as each
+    one completes: IDs already in the scan index first, then every batch (or
+    single ID) in the order the API answers.
+    """
+    known = scan_index.lookup(window)
+    to_probe = [pid for pid in window if pid not in known]
+    if known:
+        print(f"📇 {len(known)} of {len(window)} IDs served from the scan index")
+        known_ids = sorted(known)
+        yield known_ids, [known[pid] for pid in known_ids]
+
+    if PROBE_MODE == "single":
+        units = [[pid] for pid in to_probe]
+        lookup = lambda ids: [fetch_project(ids[0], headers)]
+    else:
+        units = [to_probe[i:i + PROBE_BATCH_SIZE] for i in range(0, len(to_probe), PROBE_BATCH_SIZE)]
+        lookup = lambda ids: _lookup_batch(ids, headers)
+
+    futures = {pool.submit(lookup, ids): ids for ids in units}
+    for future in as_completed(futures):
+        ids = futures[future]
+        results = future.result()
+        _record_probes(dict(zip(ids, results)), known)
+        yield ids, results
+
+
+def iter_scan_as_completed(start_id, max_found=20, max_attempts=50):
+    """
+    Streaming flavour of ``iter_scan``: yields each lookup's list of
+    (project_id, project-or-None) as soon as it completes, so the order is
+    not the ID order. Stops once ``max_found`` projects have been yielded;
+    lookups still in flight then finish in the background.
+    """
+    headers = freelancer_headers()
+    found = 0
+    next_id = start_id
+    last_id = start_id + max_attempts
+    window_size = PROBE_CONCURRENCY if PROBE_MODE == "single" else PROBE_CONCURRENCY * PROBE_BATCH_SIZE
+
+    pool = ThreadPoolExecutor(max_workers=PROBE_CONCURRENCY)
+    try:
+        while found < max_found and next_id < last_id:
+            window = list(range(next_id, min(next_id + window_size, last_id)))
+            for project_ids, results in _probe_as_completed(pool, window, headers):
+                checked = []
+                for project_id, (state, project) in zip(project_ids, results):
+                    checked.append((project_id, project))
+                    if project:
+                        found += 1
+                        print(f"✅ Project {project_id} added ({found} found)")
+                    if found >= max_found:
+                        break
+                yield checked
+                if found >= max_found:
+                    break
+            next_id = window[-1] + 1
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def scan_projects(start_id, max_found=20, max_attempts=50):
+    """
+    Runs a full ``iter_scan``. Returns (projects, checked_ids), both in ID order.
+    """
+    projects = []
+    checked_ids = []
+    for checked in iter_scan(start_id, max_found, max_attempts):
+        for project_id, project in checked:
+            checked_ids.append(project_id)
+            if project:
+                projects.append(project)
+    return projects, checked_ids
+
+
+def _newest_valid_id_from(point, headers):
+    """Returns the highest existing project ID in [point, point + FRONTIER_PROBE_SPAN), or None."""
+    project_ids = list(range(point, point + FRONTIER_PROBE_SPAN))
+    found = fetch_projects_batch(project_ids, headers)
+    if found is None:
+        raise FreelancerAPIError(f"Could not probe project IDs from {point}")
+    scan_index.record([(pid, STATE_VALID, project) for pid, project in found.items()])
+    return max(found) if found else None
+
+
+def _frontier_seed(headers):
+    """Finds a recent, existing project ID to start the frontier search from."""
+    url = f"{FREELANCER_API}/projects/0.1/projects/active/?compact=&limit=20"
+    try:
+        r = freelancer_get(url, headers=headers, timeout=15)
+        r.raise_for_status()
+        active = r.json().get("result", {}).get("projects", []) or []
+    except requests.exceptions.RequestException as e:
+        print(f"Warning: Could not fetch active projects for the frontier seed: {e}")
+        active = []
+
+    candidates = [p.get("id") for p in active if p.get("id")]
+    indexed = scan_index.max_valid_id()
+    if indexed:
+        candidates.append(indexed)
+    if not candidates:
+        raise FreelancerAPIError("Could not find a starting point for the latest project ID")
+    return max(candidates)
+
+
+def find_latest_project_id(force_refresh=False):
+    """
+    Returns the newest existing project ID. Starting from a recent known ID it
+    probes exponentially larger steps upward until a span comes back empty,
+    then binary-searches the gap. The result is cached for FRONTIER_TTL seconds.
+    """
+    with _frontier_lock:
+        if not force_refresh and _frontier["id"] and _frontier["expires_at"] > time.monotonic():
+            return _frontier["id"]
+
+        headers = freelancer_headers()
+        lo = _frontier_seed(headers)
+
+        # --- Exponential probing: find an empty span above the newest known ID ---
+        step = FRONTIER_PROBE_SPAN
+        hi = None
+        for _ in range(FRONTIER_MAX_STEPS):
+            newest = _newest_valid_id_from(lo + step, headers)
+            if newest is None:
+                hi = lo + step
+                break
+            lo = newest
+            step *= 2
+        if hi is None:
+            raise FreelancerAPIError("Project ID frontier search did not converge")
+
+        # --- Binary search between the last hit and the first empty span ---
+        while hi - lo > FRONTIER_PROBE_SPAN:
+            mid = (lo + hi) // 2
+            newest = _newest_valid_id_from(mid, headers)
+            if newest is None:
+                hi = mid
+            else:
+                lo = newest
+        newest = _newest_valid_id_from(lo + 1, headers)
+        if newest is not None:
+            lo = newest
+
+        print(f"🧭 Latest project ID is {lo}")
+        _frontier["id"] = lo
+        _frontier["expires_at"] = time.monotonic() + FRONTIER_TTL
+        return lo
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+
+import requests
+
+from utils import http_client
+from utils.cache import SingleFlight, TTLCache
+
+GEMINI_API = os.getenv("GEMINI_API", "https://generativelanguage.googleapis.com/v1beta/models").rstrip("/")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash-preview-05-20")
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", 90))
+
+# --- GENERATED BID CACHE ---
+BID_CACHE_SIZE = int(os.getenv("BID_CACHE_SIZE", 500))
+BID_CACHE_TTL = int(os.getenv("BID_CACHE_TTL", 24 * 3600))
+
+bid_cache = TTLCache(BID_CACHE_SIZE, BID_CACHE_TTL)
+_generations = SingleFlight()
+
+
+class GeminiError(Exception):
+    """Raised when Gemini fails or returns no usable text."""
+
+
+def _payload(prompt):
+    return {"contents": [{"parts": [{"text": prompt}]}]}
+
+
+def _candidate_text(result):
+    """Joins the text parts of the first candidate of a Gemini response."""
+    candidates = result.get('candidates') or []
+    if not candidates:
+        return ''
+    parts = (candidates[0].get('content') or {}).get('parts') or []
+    return ''.join(part.get('text', '') for part in parts)
+
+
+def generate_text(prompt, timeout=GEMINI_TIMEOUT):
+    """Runs a blocking generateContent call and returns the generated text."""
+    api_key = os.getenv('GEMINI_API_KEY')
+    api_url = f"{GEMINI_API}/{GEMINI_MODEL}:generateContent?key={api_key}"
+    headers = {'Content-Type': 'application/json'}
+
+    try:
+        response = http_client.post(api_url, headers=headers, json=_payload(prompt), timeout=timeout)
+        response.raise_for_status()
+        text = _candidate_text(response.json())
+    except requests.exceptions.RequestException as e:
+        raise GeminiError(f'AI service error: {e}')
+
+    if not text:
+        raise GeminiError("AI returned no content.")
+    return text
+
+
+def stream_text(prompt, timeout=GEMINI_TIMEOUT):
+    """
+    Calls streamGenerateContent over SSE and yields text chunks as the model
+    produces them. Raises GeminiError if the stream fails or stays empty.
+    """
+    api_key = os.getenv('GEMINI_API_KEY')
+    api_url = f"{GEMINI_API}/{GEMINI_MODEL}:streamGenerateContent?alt=sse&key={api_key}"
+    headers = {'Content-Type': 'application/json'}
+    produced = False
+
+    try:
+        with http_client.post(api_url, headers=headers, json=_payload(prompt), timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                text = _candidate_text(json.loads(line[len('data:'):].strip()))
+                if text:
+                    produced = True
+                    yield text
+    except (requests.exceptions.RequestException, ValueError) as e:
+        raise GeminiError(f'AI service error: {e}')
+
+    if not produced:
+        raise GeminiError("AI returned no content.")
+
+
+def prompt_key(prompt):
+    """Content address of a prompt: the same model and prompt always map to the same key."""
+    return hashlib.sha256(f"{GEMINI_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+def cached_text(prompt):
+    """Returns the cached generation for ``prompt``, or None."""
+    return bid_cache.get(prompt_key(prompt))
+
+
+def remember_text(prompt, text):
+    bid_cache.set(prompt_key(prompt), text)
+
+
+def generate_cached(prompt, regenerate=False, timeout=GEMINI_TIMEOUT):
+    """
+    Like ``generate_text`` but served from ``bid_cache`` when the same prompt
+    was generated before, and with concurrent identical prompts sharing one
+    model call. ``regenerate`` skips both, so it always makes a fresh model
+    call (the result still replaces the cached entry). Returns (text, from_cache).
+    """
+    key = prompt_key(prompt)
+
+    def _generate():
+        text = generate_text(prompt, timeout=timeout)
+        bid_cache.set(key, text)
+        return text
+
+    if regenerate:
+        return _generate(), False
+
+    text = bid_cache.get(key)
+    if text is not None:
+        return text, True
+    return _generations.do(key, _generate), False
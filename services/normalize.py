@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+
+# Output profiles for project lists:
+#   "full"    - everything the /search frontend shows, client verification flags included
+#   "compact" - the reduced client record /search_with_id sends for each scanned project
+PROFILE_FULL = "full"
+PROFILE_COMPACT = "compact"
+PROFILES = (PROFILE_FULL, PROFILE_COMPACT)
+
+CATEGORY_RATINGS = ("clarity_spec", "communication", "payment_prom", "professionalism", "work_for_again")
+
+_EMPTY = {}
+
+
+def _dict(value):
+    # The API sends null for missing objects as often as it omits them
+    return value if isinstance(value, dict) else _EMPTY
+
+
+def _text(value):
+    return value.strip() if isinstance(value, str) else ""
+
+
+@dataclass(slots=True)
+class Client:
+    """A Freelancer user as the project lists show it (the project's owner)."""
+
+    id: object
+    username: object
+    display_name: object
+    public_name: object
+    country: object
+    country_code: object
+    city: object
+    registration_date: object
+    avatar: object
+    company: object
+    role: object
+    chosen_role: object
+    # employer_reputation.entire_history, kept as-is and read when rendering
+    history: dict
+    status: dict
+    limited_account: object
+    membership_package: object
+
+    @classmethod
+    def from_user(cls, owner_id, user):
+        """Builds a client from a /users/0.1/users record (or {} when the owner is unknown)."""
+        user = _dict(user)
+        location = _dict(user.get("location"))
+        country = _dict(location.get("country"))
+        return cls(
+            id=owner_id,
+            username=user.get("username", "N/A"),
+            display_name=user.get("display_name", "N/A"),
+            public_name=user.get("public_name"),
+            country=country.get("name", "N/A"),
+            country_code=country.get("code"),
+            city=location.get("city"),
+            registration_date=user.get("registration_date"),
+            avatar=user.get("avatar_large_cdn") or user.get("avatar_large") or user.get("avatar_cdn"),
+            company=user.get("company"),
+            role=user.get("role"),
+            chosen_role=user.get("chosen_role"),
+            history=_dict(_dict(user.get("employer_reputation")).get("entire_history")),
+            status=_dict(user.get("status")),
+            limited_account=user.get("limited_account"),
+            membership_package=user.get("membership_package"),
+        )
+
+    def to_dict(self, profile=PROFILE_FULL):
+        history = self.history
+        if profile == PROFILE_COMPACT:
+            return {
+                "id": self.id,
+                "country": self.country,
+                "rating": {
+                    "overall": history.get("overall"),
+                    "on_budget": history.get("on_budget"),
+                    "on_time": history.get("on_time"),
+                    "positive": history.get("positive"),
+                    "reviews": history.get("reviews"),
+                    "completion_rate": history.get("completion_rate"),
+                },
+            }
+
+        category_ratings = _dict(history.get("category_ratings"))
+        status = self.status
+        has_username = self.username and self.username != "N/A"
+        return {
+            "id": self.id,
+            "username": self.username,
+            "display_name": self.display_name,
+            "public_name": self.public_name,
+            "country": self.country,
+            "country_code": self.country_code,
+            "city": self.city,
+            "registration_date": self.registration_date,
+            "profile_url": f"https://www.freelancer.com/u/{self.username}" if has_username else None,
+            "avatar": self.avatar,
+            "company": self.company,
+            "role": self.role,
+            "chosen_role": self.chosen_role,
+            "rating": {
+                "overall": history.get("overall"),
+                "on_budget": history.get("on_budget"),
+                "on_time": history.get("on_time"),
+                "positive": history.get("positive"),
+                "all": history.get("all"),
+                "reviews": history.get("reviews"),
+                "complete": history.get("complete"),
+                "incomplete": history.get("incomplete"),
+                "completion_rate": history.get("completion_rate"),
+                "rehire_rate": history.get("rehire_rate"),
+                "category_ratings": {name: category_ratings.get(name) for name in CATEGORY_RATINGS},
+            },
+            "payment_verified": status.get("payment_verified"),
+            "email_verified": status.get("email_verified"),
+            "deposit_made": status.get("deposit_made"),
+            "identity_verified": status.get("identity_verified"),
+            "phone_verified": status.get("phone_verified"),
+            "limited_account": self.limited_account,
+            "membership_package": self.membership_package,
+        }
+
+
+@dataclass(slots=True)
+class Project:
+    """A Freelancer project with its owner, ready to render in either profile."""
+
+    id: object
+    seo_url: object
+    title: object
+    preview_description: str
+    description: str
+    budget_minimum: object
+    budget_maximum: object
+    currency_code: object
+    currency_country: object
+    bid_count: object
+    bid_avg: float
+    bidperiod: object
+    client: Client
+
+    @classmethod
+    def from_api(cls, project, client):
+        budget = _dict(project.get("budget"))
+        currency = _dict(project.get("currency"))
+        bid_stats = _dict(project.get("bid_stats"))
+        try:
+            bid_avg = round(float(bid_stats.get("bid_avg") or 0), 2)
+        except (TypeError, ValueError):
+            bid_avg = 0.0
+        return cls(
+            id=project.get("id"),
+            seo_url=project.get("seo_url"),
+            title=project.get("title", "N/A"),
+            preview_description=_text(project.get("preview_description")),
+            description=_text(project.get("description")),
+            budget_minimum=budget.get("minimum", 0),
+            budget_maximum=budget.get("maximum", 0),
+            currency_code=currency.get("code", "NA"),
+            currency_country=currency.get("country", "NA"),
+            bid_count=bid_stats.get("bid_count", 0),
+            bid_avg=bid_avg,
+            bidperiod=project.get("bidperiod"),
+            client=client,
+        )
+
+    def to_dict(self, profile=PROFILE_FULL):
+        result = {
+            "id": self.id,
+            "seo_url": self.seo_url,
+            "title": self.title,
+            "preview_description": self.preview_description,
+            "description": self.description,
+            "budget": {"minimum": self.budget_minimum, "maximum": self.budget_maximum},
+            "currency": {"code": self.currency_code},
+            "bid_stats": {"bid_count": self.bid_count, "bid_avg": self.bid_avg},
+        }
+        if profile != PROFILE_COMPACT:
+            result["country"] = {"country": self.currency_country}
+            result["bidperiod"] = self.bidperiod
+        result["client"] = self.client.to_dict(profile)
+        return result
+
+
+def normalize_projects(projects, users):
+    """
+    Turns raw API projects into Project records, each with its owner from
+    ``users`` ({str(owner_id): user}, as returned by fetch_users). A client
+    record is built once per owner, however many of the projects are theirs.
+    """
+    clients = {}
+    records = []
+    for project in projects:
+        owner_id = project.get("owner_id")
+        client = clients.get(owner_id)
+        if client is None:
+            client = Client.from_user(owner_id, users.get(str(owner_id)) if owner_id else None)
+            clients[owner_id] = client
+        records.append(Project.from_api(project, client))
+    return records
+
+
+def render_projects(records, profile=PROFILE_FULL):
+    return [record.to_dict(profile) for record in records]
+
+
+def resolve_profile(value, default):
+    """Returns ``value`` if it names a profile, else ``default``."""
+    return value if value in PROFILES else default
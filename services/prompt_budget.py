@@ -0,0 +1,126 @@
+import os
+import re
+import threading
+
+# --- PROMPT BUDGET CONFIGURATION ---
+# Rough estimate for English text; good enough to budget, not to bill.
+CHARS_PER_TOKEN = 4
+PROMPT_DESCRIPTION_MAX_TOKENS = int(os.getenv("PROMPT_DESCRIPTION_MAX_TOKENS", 1000))
+# When set, a character budget takes precedence over the token budget
+PROMPT_DESCRIPTION_MAX_CHARS = int(os.getenv("PROMPT_DESCRIPTION_MAX_CHARS", 0))
+
+TRIM_MARKER = "\n[...]\n"
+
+TECH_KEYWORDS = frozenset("""
+    ai android angular api aws azure backend blockchain bootstrap c# c++ chatbot css
+    database django docker ecommerce express figma firebase flask flutter frontend gcp
+    git golang graphql html ios java javascript jquery kotlin kubernetes laravel linux
+    llm magento ml mobile mongodb mysql next.js nextjs node node.js nodejs openai php
+    postgres postgresql python pytorch react react-native redis rest scraping seo shopify
+    sql swift tailwind tensorflow typescript ui ux vue vue.js web3 webflow wix woocommerce
+    wordpress
+""".split())
+
+_SECTION_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+_WORD = re.compile(r"[a-z0-9#+.\-]+")
+
+
+def estimate_tokens(text):
+    return (len(text or "") + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def description_budget():
+    """Returns the description budget in characters."""
+    if PROMPT_DESCRIPTION_MAX_CHARS > 0:
+        return PROMPT_DESCRIPTION_MAX_CHARS
+    return PROMPT_DESCRIPTION_MAX_TOKENS * CHARS_PER_TOKEN
+
+
+def _clip(text, limit):
+    if len(text) <= limit:
+        return text
+    return text[:max(0, limit)].rsplit(" ", 1)[0]
+
+
+def fit_description(description, title="", max_chars=None):
+    """
+    Trims a project description to ``max_chars`` deterministically. The first
+    and last sections are kept (they usually hold the ask and the deliverables),
+    then the middle sentences that mention a tech keyword or a title word are
+    added back in their original order while they fit.
+    """
+    description = (description or "").strip()
+    max_chars = max_chars or description_budget()
+    if len(description) <= max_chars:
+        return description
+
+    sections = [s.strip() for s in _SECTION_SPLIT.split(description) if s.strip()]
+    if len(sections) < 3:
+        sections = [s.strip() for s in _SENTENCE_SPLIT.split(description) if s.strip()]
+    if len(sections) < 3:
+        return _clip(description, max_chars)
+
+    edge_limit = max_chars // 3
+    first = _clip(sections[0], edge_limit)
+    last = _clip(sections[-1], edge_limit)
+    remaining = max_chars - len(first) - len(last) - 2 * len(TRIM_MARKER)
+
+    title_words = {w for w in _WORD.findall((title or "").lower()) if len(w) > 3}
+    wanted = TECH_KEYWORDS | title_words
+
+    middle = []
+    for section in sections[1:-1]:
+        for sentence in _SENTENCE_SPLIT.split(section):
+            sentence = sentence.strip()
+            if not sentence or len(sentence) + 1 > remaining:
+                continue
+            if wanted.intersection(_WORD.findall(sentence.lower())):
+                middle.append(sentence)
+                remaining -= len(sentence) + 1
+
+    parts = [first]
+    if middle:
+        parts.append(" ".join(middle))
+    parts.append(last)
+    return TRIM_MARKER.join(parts)
+
+
+class PromptStats:
+    """Running totals of prompt sizes before and after the description budget is applied."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.prompts = 0
+        self.trimmed = 0
+        self.chars_before = 0
+        self.chars_after = 0
+        self.max_chars_before = 0
+        self.max_chars_after = 0
+
+    def record(self, chars_before, chars_after):
+        with self._lock:
+            self.prompts += 1
+            self.trimmed += chars_after < chars_before
+            self.chars_before += chars_before
+            self.chars_after += chars_after
+            self.max_chars_before = max(self.max_chars_before, chars_before)
+            self.max_chars_after = max(self.max_chars_after, chars_after)
+
+    def stats(self):
+        with self._lock:
+            count = self.prompts or 1
+            return {
+                "prompts": self.prompts,
+                "trimmed": self.trimmed,
+                "description_budget_chars": description_budget(),
+                "avg_chars_before": round(self.chars_before / count),
+                "avg_chars_after": round(self.chars_after / count),
+                "avg_tokens_before": round(self.chars_before / count / CHARS_PER_TOKEN),
+                "avg_tokens_after": round(self.chars_after / count / CHARS_PER_TOKEN),
+                "max_chars_before": self.max_chars_before,
+                "max_chars_after": self.max_chars_after,
+            }
+
+
+prompt_stats = PromptStats()
@@ -0,0 +1,27 @@
+import sys
+
+# gevent only patches Python-level waits. sqlite3's busy wait and fcntl.flock
+# block in C, so under a gevent worker they would stall every greenlet of the
+# process; run_blocking hands them to gevent's native threadpool instead.
+
+
+def _gevent_threadpool():
+    if "gevent.monkey" not in sys.modules:
+        return None
+    from gevent import get_hub, monkey
+
+    if not monkey.is_module_patched("threading"):
+        return None
+    return get_hub().threadpool
+
+
+def run_blocking(fn, *args):
+    """
+    Calls ``fn(*args)`` and returns its result. In a monkey-patched gevent
+    process the call runs on a native thread while the calling greenlet yields;
+    otherwise it simply runs inline.
+    """
+    pool = _gevent_threadpool()
+    if pool is None:
+        return fn(*args)
+    return pool.apply(fn, args)
@@ -0,0 +1,145 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils import metrics
+from utils.rate_limiter import parse_retry_after
+
+# --- CONFIGURATION ---
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", 4))
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", 20))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 15))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 5))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", 2))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", 0.5))
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _build_session():
+    """Creates a keep-alive session with the shared pool and retry policy."""
+    # 429 is left to the callers, which know how long to back off for. urllib3
+    # would otherwise retry it itself whenever it carries a Retry-After header.
+    retry = Retry(
+        total=HTTP_RETRIES,
+        connect=HTTP_RETRIES,
+        read=HTTP_RETRIES,
+        status=HTTP_RETRIES,
+        backoff_factor=HTTP_BACKOFF,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD", "OPTIONS"]),
+        raise_on_status=False,
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"user-agent": USER_AGENT})
+    return session
+
+
+def get_session(url):
+    """Returns the pooled session for the host of ``url``, creating it once per process."""
+    host = urlsplit(url).netloc
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _build_session()
+                _sessions[host] = session
+    return session
+
+
+# Path markers of the upstreams the app calls, checked in order; the metric
+# label is the name, so a new endpoint never adds a label value by itself.
+UPSTREAMS = (
+    ("/projects/0.1/bids", "bids"),
+    ("/projects/0.1/projects", "projects"),
+    ("/users/0.1/self", "self"),
+    ("/users/0.1/users", "users"),
+    (":generateContent", "gemini"),
+    (":streamGenerateContent", "gemini"),
+)
+
+
+def upstream_name(url):
+    path = urlsplit(url).path
+    for marker, name in UPSTREAMS:
+        if marker in path:
+            return name
+    return "other"
+
+
+def request(method, url, timeout=None, **kwargs):
+    """Sends a request through the pooled session for the target host and records its metrics."""
+    read_timeout = timeout if timeout is not None else HTTP_TIMEOUT
+    upstream = upstream_name(url)
+    start = time.perf_counter()
+    status = "error"
+    try:
+        response = get_session(url).request(
+            method, url, timeout=(HTTP_CONNECT_TIMEOUT, read_timeout), **kwargs
+        )
+        status = response.status_code
+    except requests.exceptions.Timeout:
+        status = "timeout"
+        metrics.upstream_timeouts.inc(upstream=upstream)
+        raise
+    finally:
+        # Streamed responses are timed to their headers
+        metrics.upstream_request_duration.observe(
+            time.perf_counter() - start, upstream=upstream, method=method, status=status
+        )
+
+    if status == 429:
+        metrics.upstream_rate_limited.inc(upstream=upstream)
+        metrics.upstream_retry_after.observe(
+            parse_retry_after(response.headers.get("Retry-After")), upstream=upstream
+        )
+    return response
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def warm(*urls):
+    """
+    Opens a pooled keep-alive connection to the host of each url (DNS, TCP and
+    TLS included) with a HEAD request, so the first real call reuses it.
+    Returns the hosts that answered; failures are only logged.
+    """
+    warmed = []
+    for url in urls:
+        try:
+            request("HEAD", url, timeout=HTTP_CONNECT_TIMEOUT, allow_redirects=False).close()
+            warmed.append(urlsplit(url).netloc)
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: Could not warm connection to {urlsplit(url).netloc}: {e}")
+    return warmed
+
+
+def close_all():
+    """Closes every pooled session, e.g. before a worker exits."""
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
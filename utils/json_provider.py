@@ -0,0 +1,49 @@
+import os
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: Flask's own encoder is used without it
+    orjson = None
+
+# JSON_ENCODER=std keeps Flask's encoder even when orjson is installed
+JSON_ENCODER = os.getenv("JSON_ENCODER", "orjson")
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes responses with orjson. Output matches
+    the default provider: keys are sorted, and datetimes and other non-JSON
+    types go through the same ``default`` hook.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            # json.dumps-only options (indent, separators, ...)
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs):
+        if self._app.debug or self.compact is False:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._orjson_dumps(obj) + b"\n", mimetype=self.mimetype)
+
+    def _orjson_dumps(self, obj):
+        options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        try:
+            return orjson.dumps(obj, default=self.default, option=options)
+        except TypeError:
+            # e.g. integers beyond 64 bits, which the standard encoder handles
+            return super().dumps(obj).encode("utf-8")
+
+
+def init_json(app):
+    """Installs the orjson provider on ``app`` when orjson is available. Returns the encoder name."""
+    if orjson is None or JSON_ENCODER != "orjson":
+        return "std"
+    app.json = OrjsonProvider(app)
+    return "orjson"
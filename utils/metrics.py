@@ -0,0 +1,375 @@
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+# METRICS_ENABLED=0 turns off the route hooks and the MongoDB listener
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+# With several worker processes each one saves its metrics to <pid>.json here,
+# and /metrics adds up every file. Empty keeps them in memory (single process).
+METRICS_DIR = os.getenv("METRICS_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 1))
+
+# Seconds; wide enough for Gemini calls that run close to GEMINI_TIMEOUT
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{value}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with a fixed set of label names."""
+
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def snapshot(self):
+        """Returns the values as JSON-friendly [label values, value] pairs."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def merge(self, entries):
+        """Adds snapshot ``entries`` to the values, e.g. those of an earlier process."""
+        with self._lock:
+            _add_counts(self._values, entries)
+
+    def reset(self):
+        with self._lock:
+            self._values = {}
+
+    def render(self, snapshots=None):
+        """Renders the sum of ``snapshots`` (one per process), or the local values."""
+        if snapshots is None:
+            snapshots = [self.snapshot()]
+        totals = {}
+        for entries in snapshots:
+            _add_counts(totals, entries)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(totals.items())
+        ]
+
+
+def _add_counts(totals, entries):
+    for key, value in entries:
+        key = tuple(key)
+        totals[key] = totals.get(key, 0) + value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with a fixed set of label names."""
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # per-bucket counts (the last one is +Inf), then sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        """Returns the series as JSON-friendly [label values, bucket counts, sum] lists."""
+        with self._lock:
+            return [[list(key), list(counts), total] for key, (counts, total) in self._series.items()]
+
+    def merge(self, entries):
+        """Adds snapshot ``entries`` to the series, e.g. those of an earlier process."""
+        with self._lock:
+            self._add_series(self._series, entries)
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def _add_series(self, totals, entries):
+        for key, counts, total in entries:
+            if len(counts) != len(self.buckets) + 1:
+                continue  # saved with other buckets, e.g. before an upgrade
+            series = totals.setdefault(tuple(key), [[0] * len(counts), 0.0])
+            series[0] = [a + b for a, b in zip(series[0], counts)]
+            series[1] += total
+
+    def render(self, snapshots=None):
+        """Renders the sum of ``snapshots`` (one per process), or the local series."""
+        if snapshots is None:
+            snapshots = [self.snapshot()]
+        totals = {}
+        for entries in snapshots:
+            self._add_series(totals, entries)
+        lines = []
+        for key, (counts, total) in sorted(totals.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Registry:
+    """
+    The metrics of this process. Given a ``directory``, it also saves them to
+    <directory>/<pid>.json and renders the sum over every file there, so all
+    gunicorn workers report into one set of monotonic series.
+    """
+
+    def __init__(self, directory=""):
+        self.directory = directory
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._pid = None
+        self._flusher = None
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _path(self, pid):
+        return os.path.join(self.directory, f"{pid}.json")
+
+    def _load(self, path):
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _adopt_process(self):
+        """
+        Called before each save. A forked child drops what it inherited from its
+        parent, whose own file already has it. A file left under this PID by an
+        earlier process is carried on, so its counters never go down.
+        """
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            metrics = list(self._metrics.values())
+            if self._pid is not None:
+                for metric in metrics:
+                    metric.reset()
+            saved = self._load(self._path(pid))
+            for metric in metrics:
+                metric.merge(saved.get(metric.name, []))
+            self._pid = pid
+
+    def flush(self):
+        """Saves this process's metrics to its file in ``directory``."""
+        if not self.directory:
+            return
+        self._adopt_process()
+        with self._lock:
+            data = {name: metric.snapshot() for name, metric in self._metrics.items()}
+        path = self._path(os.getpid())
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + ".tmp", "w") as f:
+                json.dump(data, f)
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print(f"Warning: Could not save metrics: {e}")
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            self.flush()
+
+    def start_flusher(self, interval=METRICS_FLUSH_INTERVAL):
+        """Saves the metrics every ``interval`` seconds and at exit, so other workers can render them."""
+        if not self.directory or (self._flusher is not None and self._pid == os.getpid()):
+            return
+        self.flush()
+        self._flusher = threading.Thread(target=self._flush_loop, args=(interval,), daemon=True)
+        self._flusher.start()
+        atexit.register(self.flush)
+
+    def _snapshots(self):
+        if not self.directory:
+            return None
+        self.flush()
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith(".json")]
+        except OSError:
+            names = []
+        return [self._load(os.path.join(self.directory, name)) for name in names]
+
+    def render(self):
+        """Returns every metric in the Prometheus text exposition format (0.0.4)."""
+        snapshots = self._snapshots()
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if snapshots is None:
+                lines.extend(metric.render())
+            else:
+                lines.extend(metric.render([snapshot.get(metric.name, []) for snapshot in snapshots]))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry(METRICS_DIR)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# --- METRICS ---
+# Label values are always from a small fixed set (route rules, upstream names,
+# MongoDB command names), never raw paths or IDs.
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Flask request latency by route", ("method", "route", "status")
+)
+upstream_request_duration = registry.histogram(
+    "upstream_request_duration_seconds", "Outbound HTTP call latency by upstream", ("upstream", "method", "status")
+)
+upstream_timeouts = registry.counter(
+    "upstream_timeouts_total", "Outbound HTTP calls that timed out", ("upstream",)
+)
+upstream_rate_limited = registry.counter(
+    "upstream_rate_limited_total", "Outbound HTTP calls answered with 429", ("upstream",)
+)
+upstream_retry_after = registry.histogram(
+    "upstream_retry_after_seconds", "Retry-After waits requested by 429 responses", ("upstream",),
+    buckets=(0.5, 1, 2, 5, 10, 30, 60, 120, 300),
+)
+rate_limit_wait = registry.histogram(
+    "freelancer_rate_limit_wait_seconds", "Time spent waiting for a Freelancer rate-limit token"
+)
+mongo_command_duration = registry.histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ("command", "collection", "status")
+)
+
+
+def instrument_app(app):
+    """Times every Flask request into http_request_duration, labelled by its URL rule."""
+    from flask import g, request
+
+    if not METRICS_ENABLED:
+        return
+    registry.start_flusher()
+
+    @app.before_request
+    def _start_timer():
+        g.metrics_start = time.perf_counter()
+
+    @app.after_request
+    def _observe_request(response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            # Streamed responses are timed to their first byte
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                method=request.method, route=route, status=response.status_code,
+            )
+        return response
+
+    @app.teardown_request
+    def _observe_failure(exc):
+        # after_request is skipped when a view raises
+        start = g.pop("metrics_start", None)
+        if start is not None and exc is not None:
+            route = request.url_rule.rule if request.url_rule else "unmatched"
+            http_request_duration.observe(
+                time.perf_counter() - start, method=request.method, route=route, status=500
+            )
+
+
+def mongo_command_listener():
+    """Returns a pymongo CommandListener that feeds mongo_command_duration."""
+    from pymongo import monitoring
+
+    class MongoCommandListener(monitoring.CommandListener):
+        def __init__(self):
+            self._collections = {}
+            self._lock = threading.Lock()
+
+        def started(self, event):
+            # {"find": "bids", ...}; getMore names its collection separately
+            key = "collection" if event.command_name == "getMore" else event.command_name
+            collection = event.command.get(key)
+            if isinstance(collection, str):
+                with self._lock:
+                    self._collections[(event.connection_id, event.request_id)] = collection
+
+        def _finish(self, event, status):
+            with self._lock:
+                collection = self._collections.pop((event.connection_id, event.request_id), "")
+            mongo_command_duration.observe(
+                event.duration_micros / 1e6, command=event.command_name, collection=collection, status=status
+            )
+
+        def succeeded(self, event):
+            self._finish(event, "ok")
+
+        def failed(self, event):
+            self._finish(event, "failed")
+
+    return MongoCommandListener()
@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from utils.blocking import run_blocking
+
+try:
+    import fcntl
+except ImportError:  # Windows desktop build: state is shared between threads only
+    fcntl = None
+
+
+def parse_retry_after(value, default=5):
+    """Parses a Retry-After header given either as seconds or as an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class TokenBucket:
+    """
+    Token bucket whose state lives in a small JSON file guarded by flock, so
+    every gunicorn worker on the host draws from the same budget. A 429 puts
+    the bucket into a cooldown that all workers wait out before sending again.
+    """
+
+    def __init__(self, rate, capacity, state_path, max_cooldown=300):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.state_path = state_path
+        self.max_cooldown = max_cooldown
+        self._lock = threading.Lock()
+
+    def _update(self, mutate):
+        """Runs ``mutate(state, now)`` under the process and file locks and saves the result."""
+        # flock blocks in C, so under gevent it waits on a native thread
+        with self._lock:
+            return run_blocking(self._update_file, mutate)
+
+    def _update_file(self, mutate):
+        with open(self.state_path, "a+") as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = time.time()
+                state.setdefault("cooldown_until", 0.0)
+                tokens = state.get("tokens", self.capacity)
+                # Nothing refills while a cooldown is running
+                refill_from = max(state.get("updated", now), state["cooldown_until"])
+                state["tokens"] = min(self.capacity, tokens + max(0.0, now - refill_from) * self.rate)
+                state["updated"] = now
+
+                result = mutate(state, now)
+
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                if fcntl:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _take(self, state, now):
+        if now < state["cooldown_until"]:
+            return state["cooldown_until"] - now
+        if state["tokens"] >= 1:
+            state["tokens"] -= 1
+            return 0.0
+        return (1 - state["tokens"]) / self.rate if self.rate > 0 else 1.0
+
+    def acquire(self):
+        """Blocks until a token is available and no cooldown is in effect."""
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._update(self._take)
+            if wait <= 0:
+                return
+            time.sleep(min(wait, 1.0))
+
+    def cooldown(self, seconds):
+        """Pauses every caller for ``seconds``, e.g. after a 429 with Retry-After."""
+        seconds = min(seconds, self.max_cooldown)
+
+        def _apply(state, now):
+            state["cooldown_until"] = max(state["cooldown_until"], now + seconds)
+            state["tokens"] = 0.0
+
+        self._update(_apply)
+
+
+FREELANCER_RATE_LIMIT = float(os.getenv("FREELANCER_RATE_LIMIT", 10))
+FREELANCER_BURST = float(os.getenv("FREELANCER_BURST", 20))
+RATE_LIMIT_STATE_FILE = os.getenv(
+    "RATE_LIMIT_STATE_FILE",
+    os.path.join(tempfile.gettempdir(), "freelancer_rate_limit.json"),
+)
+
+freelancer_limiter = TokenBucket(FREELANCER_RATE_LIMIT, FREELANCER_BURST, RATE_LIMIT_STATE_FILE)
@@ -0,0 +1,78 @@
+import builtins
+import importlib.util
+import os
+import sys
+import threading
+import time
+
+# STARTUP_PROFILE=1 reports how long each module import and init step took
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "0") == "1"
+STARTUP_PROFILE_TOP = int(os.getenv("STARTUP_PROFILE_TOP", 15))
+
+_started = time.perf_counter()
+_imports = {}
+_steps = []
+_stack = []
+_original_import = builtins.__import__
+_lock = threading.Lock()
+
+
+def _module_name(name, globals, level):
+    if level <= 0:
+        return name
+    package = (globals or {}).get("__package__") or ""
+    try:
+        return importlib.util.resolve_name("." * level + name, package)
+    except (ImportError, ValueError):
+        return name
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    module = _module_name(name, globals, level)
+    # Only first imports cost anything; everything else is a sys.modules lookup
+    if module in sys.modules or threading.current_thread() is not threading.main_thread():
+        return _original_import(name, globals, locals, fromlist, level)
+
+    _stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        total = time.perf_counter() - start
+        children = _stack.pop()
+        if _stack:
+            _stack[-1] += total
+        # Self time, so a module is not blamed for the dependencies it pulls in
+        _imports[module] = _imports.get(module, 0.0) + total - children
+
+
+def begin():
+    """Starts recording imports when STARTUP_PROFILE is set. Call before the heavy imports."""
+    if STARTUP_PROFILE and builtins.__import__ is not _timed_import:
+        builtins.__import__ = _timed_import
+
+
+def mark(label):
+    """Records an init step that finished now, timed from the previous mark."""
+    if not STARTUP_PROFILE:
+        return
+    with _lock:
+        now = time.perf_counter()
+        previous = _steps[-1][2] if _steps else _started
+        _steps.append((label, now - previous, now))
+
+
+def report():
+    """Stops recording and prints the slowest imports and every init step."""
+    if not STARTUP_PROFILE:
+        return
+    builtins.__import__ = _original_import
+    total = time.perf_counter() - _started
+
+    print(f"🚀 Startup took {total * 1000:.0f} ms (pid {os.getpid()})")
+    print(f"📦 Slowest imports (self time, top {STARTUP_PROFILE_TOP}):")
+    for name, seconds in sorted(_imports.items(), key=lambda item: -item[1])[:STARTUP_PROFILE_TOP]:
+        print(f"   {seconds * 1000:8.1f} ms  {name}")
+    print("⏱️ Init steps:")
+    for label, seconds, _ in _steps:
+        print(f"   {seconds * 1000:8.1f} ms  {label}")